@@ -3,6 +3,7 @@ import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
+from channels.security.websocket import AllowedHostsOriginValidator
 import keiths_skittles.routing
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "keiths_skittles.settings")
@@ -11,9 +12,13 @@ django_asgi_app = get_asgi_application()
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
-        URLRouter(
-            keiths_skittles.routing.websocket_urlpatterns
+    # The session cookie authenticates staff score entry over the socket, so only pages
+    # served from ALLOWED_HOSTS may open one (no cross-site WebSocket hijacking)
+    "websocket": AllowedHostsOriginValidator(
+        AuthMiddlewareStack(
+            URLRouter(
+                keiths_skittles.routing.websocket_urlpatterns
+            )
         )
     ),
 })
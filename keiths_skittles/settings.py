@@ -29,7 +29,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",  # Add this after SecurityMiddleware
+    "scores.middleware.AsyncWhiteNoiseMiddleware",  # WhiteNoise, async-capable; keep it after SecurityMiddleware
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -38,6 +38,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Opt-in per-request SQL/timing instrumentation: Server-Timing headers plus a
+# staff-only JSON view of the most recent requests (see scores/middleware.py).
+QUERY_TIMING = os.environ.get("QUERY_TIMING", "False") == "True"
+QUERY_TIMING_BUFFER_SIZE = int(os.environ.get("QUERY_TIMING_BUFFER_SIZE", "200"))
+if QUERY_TIMING:
+    MIDDLEWARE.insert(0, "scores.middleware.QueryTimingMiddleware")
+
 ROOT_URLCONF = "keiths_skittles.urls"
 
 TEMPLATES = [
@@ -59,13 +66,23 @@ TEMPLATES = [
 # ASGI application for Channels.
 ASGI_APPLICATION = "keiths_skittles.asgi.application"
 
-# Channels configuration: using the in-memory layer for development.
+# Channels configuration: group messages reach every worker process through the
+# database (scores/channel_layer.py). CHANNEL_LAYER=memory keeps them in one
+# process, which is enough for a single-worker development server.
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+        "BACKEND": (
+            "channels.layers.InMemoryChannelLayer" if os.environ.get("CHANNEL_LAYER") == "memory"
+            else "scores.channel_layer.DatabaseChannelLayer"
+        ),
     },
 }
 
+# Live game sockets: deltas arriving within this many seconds go out as one frame,
+# and a socket more than LIVE_UPDATE_QUEUE deltas behind gets a fresh snapshot instead.
+LIVE_UPDATE_WINDOW = float(os.environ.get("LIVE_UPDATE_WINDOW", "0.05"))
+LIVE_UPDATE_QUEUE = int(os.environ.get("LIVE_UPDATE_QUEUE", "50"))
+
 DATABASES = {}
 
 DATABASES['default'] = dj_database_url.config(
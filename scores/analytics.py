@@ -0,0 +1,109 @@
+# scores/analytics.py
+"""
+Vectorised per-player analytics for player_statistics.
+
+All of a player's turns are fetched with one values_list query and turned
+into NumPy arrays; the score distribution, percentiles, spread, per-roll
+means, per-game averages and rolling form are then computed on the arrays.
+The result is cached under a token over the player's games (count, highest
+id and the sum of their versions), so any score write in one of those games
+invalidates it.
+
+The plain career counters (totals, zeros, highs, W/L/D) stay on PlayerCareer.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+
+from .models import PlayerGameLine, Score
+from .rules import RULES
+
+CACHE_TIMEOUT = 60 * 60 * 24
+MAX_TURN_SCORE = int(RULES.totals.max())  # Highest legal turn total, so the bins follow the rules table
+PERCENTILES = (10, 25, 50, 75, 90)
+FORM_WINDOW = 5  # Games in the rolling average
+
+
+def _player_token(player_id):
+    token = PlayerGameLine.objects.filter(player_id=player_id).aggregate(
+        n=Count("id"), last=Max("game_id"), versions=Sum("game__version"),
+    )
+    return f"{token['n']}.{token['last'] or 0}.{token['versions'] or 0}"
+
+
+def _rolls(values):
+    # None (roll not recorded) becomes NaN so it drops out of the per-roll means
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def compute_player_analytics(player_id, form_window=FORM_WINDOW):
+    rows = list(
+        Score.objects.filter(player_id=player_id)
+        .order_by("game__date", "game_id", "round_number", "cycle_number", "id")
+        .values_list(
+            "game_id", "game__date", "game__opponent__name", "game__location__name",
+            "roll1", "roll2", "roll3", "total",
+        )
+    )
+    if not rows:
+        return None
+
+    game_ids, dates, opponents, locations, roll1, roll2, roll3, totals = zip(*rows)
+    game_ids = np.array(game_ids)
+    totals = np.array(totals, dtype=np.int64)
+    rolls = np.vstack([_rolls(roll1), _rolls(roll2), _rolls(roll3)])
+
+    # Per-game averages, in date order (rows are already sorted by game date)
+    _, first_index, inverse = np.unique(game_ids, return_index=True, return_inverse=True)
+    game_order = np.argsort(first_index, kind="stable")
+    game_sums = np.bincount(inverse, weights=totals)[game_order]
+    game_turns = np.bincount(inverse)[game_order]
+    game_avgs = game_sums / game_turns
+    game_rows = np.sort(first_index)
+
+    if len(game_avgs) >= form_window:
+        rolling = np.convolve(game_avgs, np.ones(form_window) / form_window, mode="valid")
+    else:
+        rolling = np.array([])
+
+    mean = float(totals.mean())
+    std = float(totals.std())
+    recorded = (~np.isnan(rolls)).sum(axis=1)
+    roll_sums = np.nansum(rolls, axis=1)
+    return {
+        "turns": int(totals.size),
+        "mean": round(mean, 2),
+        "std_dev": round(std, 2),
+        # Coefficient of variation: lower is more consistent
+        "consistency": round(std / mean, 3) if mean else None,
+        "percentiles": {
+            f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(totals, PERCENTILES))
+        },
+        "distribution": np.bincount(totals, minlength=MAX_TURN_SCORE + 1).tolist(),
+        "roll_means": [
+            round(float(total / n), 2) if n else None for total, n in zip(roll_sums, recorded)
+        ],
+        "form_window": form_window,
+        "form": round(float(rolling[-1]), 2) if rolling.size else None,
+        "rolling_avgs": [round(float(v), 2) for v in rolling],
+        "games": [
+            {
+                "game__id": int(game_ids[i]),
+                "game__date": dates[i],
+                "game__opponent__name": opponents[i],
+                "game__location__name": locations[i],
+                "game_avg": round(float(avg), 2),
+            }
+            for i, avg in zip(game_rows, game_avgs)
+        ],
+    }
+
+
+def get_player_analytics(player_id):
+    """Cached analytics for the player, or None if they have no scores."""
+    key = f"player_analytics:{player_id}:{_player_token(player_id)}"
+    analytics = cache.get(key)
+    if analytics is None:
+        analytics = compute_player_analytics(player_id)
+        cache.set(key, analytics, CACHE_TIMEOUT)
+    return analytics
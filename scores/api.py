@@ -0,0 +1,220 @@
+# scores/api.py
+"""
+Read-only JSON API for scoreboard displays and phone clients.
+
+Every endpoint is wrapped in django's condition() with an ETag built from
+version numbers: Game.version for a game, and for a player, an opponent or
+the games list a token over the versions of the games involved (count,
+highest id, sum of versions). The ETag function is a single small query and
+runs before the view, so a poll with a matching If-None-Match gets a 304
+without any aggregation. Responses are marked no-cache, so clients always
+revalidate rather than show a stale score.
+
+Renaming an opponent, location, game type or player bumps the version of
+every game that shows the name (scores/signals.py), so those tags move on too.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Q, Sum
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+
+from .analytics import get_player_analytics
+from .history import InvalidCursor, games_feed_page
+from .models import Game, GamePlayer, Opponent, Player, PlayerCareer, Score
+from .opponent_stats import opponent_stats
+from .totals import game_team_totals
+
+
+def _token(*parts):
+    return "-".join(str(part) for part in parts)
+
+
+def _name_hash(name):
+    # Renames don't bump any version, so the name is folded into the tag
+    return hashlib.md5(name.encode(), usedforsecurity=False).hexdigest()[:8]
+
+
+def _first_row(queryset):
+    # first() refuses grouped querysets without an ordering
+    return next(iter(queryset.order_by()[:1]), None)
+
+
+def _int_param(request, name):
+    value = request.GET.get(name, "").strip()
+    return int(value) if value else None
+
+
+def api_view(etag_func):
+    """GET/HEAD only, conditional on etag_func, always revalidated by clients."""
+    def decorator(view):
+        return require_safe(cache_control(no_cache=True)(condition(etag_func=etag_func)(view)))
+    return decorator
+
+
+# --- ETags ---
+
+def games_etag(request):
+    token = Game.objects.aggregate(n=Count("id"), last=Max("id"), versions=Sum("version"))
+    return _token("games", token["n"], token["last"] or 0, token["versions"] or 0, _name_hash(request.GET.urlencode()))
+
+
+def game_etag(request, game_id):
+    version = Game.objects.filter(pk=game_id).values_list("version", flat=True).first()
+    return None if version is None else _token("game", game_id, version)
+
+
+def scorecard_etag(request, game_id):
+    version = Game.objects.filter(pk=game_id).values_list("version", flat=True).first()
+    return None if version is None else _token("scorecard", game_id, version)
+
+
+def player_etag(request, player_id):
+    row = _first_row(
+        Player.objects.filter(pk=player_id)
+        .values("name")
+        .annotate(n=Count("game_lines"), last=Max("game_lines__game_id"), versions=Sum("game_lines__game__version"))
+    )
+    if row is None:
+        return None
+    return _token("player", player_id, row["n"], row["last"] or 0, row["versions"] or 0, _name_hash(row["name"]))
+
+
+def opponent_etag(request, opponent_id):
+    try:
+        game_type_id = _int_param(request, "game_type")
+    except ValueError:
+        return None
+    games = Q(games__game_type_id=game_type_id) if game_type_id else Q()
+    row = _first_row(
+        Opponent.objects.filter(pk=opponent_id)
+        .values("name")
+        .annotate(
+            n=Count("games", filter=games), last=Max("games__id", filter=games),
+            versions=Sum("games__version", filter=games),
+        )
+    )
+    if row is None:
+        return None
+    return _token(
+        "opponent", opponent_id, game_type_id or "all",
+        row["n"], row["last"] or 0, row["versions"] or 0, _name_hash(row["name"]),
+    )
+
+
+# --- Payloads ---
+
+def _game_json(game, own_total, opp_total):
+    return {
+        "id": game.id,
+        "date": game.date.isoformat(),
+        "opponent": game.opponent.name if game.opponent else None,
+        "location": game.location.name if game.location else None,
+        "game_type": game.game_type.name if game.game_type else None,
+        "own_total": own_total,
+        "opp_total": opp_total,
+        "result": "Win" if own_total > opp_total else "Loss" if own_total < opp_total else "Draw",
+        "version": game.version,
+        "url": reverse("api_game", args=[game.id]),
+    }
+
+
+@api_view(games_etag)
+def games(request):
+    """Past games, newest first; same cursor, limit and filters as the past games feed."""
+    try:
+        page = games_feed_page(
+            cursor=request.GET.get("cursor") or None,
+            limit=_int_param(request, "limit") or 20,
+            opponent_id=_int_param(request, "opponent"),
+            location_id=_int_param(request, "location"),
+            result=request.GET.get("result", "").strip() or None,
+        )
+    except (InvalidCursor, ValueError):
+        return JsonResponse({"error": "Invalid cursor, filter or limit"}, status=400)
+    return JsonResponse({
+        "games": [_game_json(game, game.own_total, game.opp_total) for game in page["games"]],
+        "next_cursor": page["next_cursor"],
+    })
+
+
+@api_view(game_etag)
+def game(request, game_id):
+    game = get_object_or_404(Game.objects.select_related("opponent", "location", "game_type"), pk=game_id)
+    totals = game_team_totals([game.id])[game.id]
+    return JsonResponse({
+        **_game_json(game, totals["own"], totals["opp"]),
+        "cycles_per_round": game.cycles_per_round,
+        "team_first": game.team_first,
+        "scorecard_url": reverse("api_game_scorecard", args=[game.id]),
+    })
+
+
+@api_view(scorecard_etag)
+def game_scorecard(request, game_id):
+    """Every round's lineups and turns, in play order."""
+    game = get_object_or_404(Game, pk=game_id)
+    rounds = {}
+    team_by_player = {}
+    for round_number, player_id, name, team in (
+        GamePlayer.objects.filter(game=game)
+        .order_by("round_number", "team", "id")
+        .values_list("round_number", "player_id", "player__name", "team")
+    ):
+        lineup = rounds.setdefault(round_number, {"round": round_number, "lineup": {"own": [], "opp": []}, "turns": []})
+        lineup["lineup"][team].append({"player_id": player_id, "name": name})
+        team_by_player[(round_number, player_id)] = team
+    for round_number, cycle, player_id, name, roll1, roll2, roll3, total in (
+        Score.objects.filter(game=game)
+        .order_by("round_number", "cycle_number", "id")
+        .values_list("round_number", "cycle_number", "player_id", "player__name", "roll1", "roll2", "roll3", "total")
+    ):
+        rounds.setdefault(round_number, {"round": round_number, "lineup": {"own": [], "opp": []}, "turns": []})
+        rounds[round_number]["turns"].append({
+            "cycle": cycle, "player_id": player_id, "player": name,
+            "team": team_by_player.get((round_number, player_id)),
+            "rolls": [roll1, roll2, roll3], "total": total,
+        })
+    return JsonResponse({"game_id": game.id, "version": game.version, "rounds": [rounds[r] for r in sorted(rounds)]})
+
+
+@api_view(player_etag)
+def player(request, player_id):
+    player = get_object_or_404(Player, pk=player_id)
+    career = PlayerCareer.objects.filter(player=player).first() or PlayerCareer(player=player)
+    analytics = get_player_analytics(player.id)
+    summary = None
+    if analytics:
+        summary = {key: value for key, value in analytics.items() if key != "games"}
+    return JsonResponse({
+        "id": player.id,
+        "name": player.name,
+        "career": {
+            "games_participated": career.games_participated,
+            "total_score": career.total_score,
+            "cycles": career.cycles,
+            "rolls": career.rolls,
+            "zero_cycles": career.zero_cycles,
+            "zero_rolls": career.zero_rolls,
+            "highest_cycle_score": career.highest_cycle_score,
+            "highest_roll_score": career.highest_roll_score,
+            "wins": career.wins,
+            "losses": career.losses,
+            "draws": career.draws,
+        },
+        "analytics": summary,
+    })
+
+
+@api_view(opponent_etag)
+def opponent(request, opponent_id):
+    opponent = get_object_or_404(Opponent, pk=opponent_id)
+    try:
+        game_type_id = _int_param(request, "game_type")
+    except ValueError:
+        return JsonResponse({"error": "Invalid game_type"}, status=400)
+    stats, chart_data = opponent_stats(opponent, game_type_id)
+    return JsonResponse({"id": opponent.id, "name": opponent.name, "stats": stats, "score_diffs": chart_data})
@@ -0,0 +1,85 @@
+# scores/broadcast.py
+"""
+Fan-out of live scoring deltas to everyone watching a game over the
+ws/game/<id>/ socket (see GameConsumer). Deltas are only published once the
+transaction that wrote the scores has committed.
+
+Each delta carries "seq", the Game.version its write produced. record_turns
+bumps the version exactly once, so a delta takes a viewer from seq - 1 to seq.
+Every process keeps the recent deltas of each game in a bounded backlog. It
+records what it publishes and what its consumers receive from the group. A
+reconnecting client that presents its last seq gets the missed deltas from
+the backlog when they form an unbroken chain up to the game's current
+version. When they don't, it gets a snapshot instead. A gap means the backlog
+was trimmed, this process wasn't listening, or the version moved without a
+delta (a lineup or an edit).
+"""
+import logging
+import threading
+from collections import OrderedDict, deque
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+BACKLOG_SIZE = 200  # Deltas kept per game
+MAX_BACKLOG_GAMES = 128
+
+_backlogs = OrderedDict()  # game_id -> deque of deltas, in arrival order
+_backlog_lock = threading.Lock()
+
+
+def game_group_name(game_id):
+    return f"game_{game_id}"
+
+
+def publish(game_id, data):
+    """Send data to the game's group right away (callers normally go through publish_on_commit)."""
+    remember(game_id, data)
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(game_group_name(game_id), {"type": "game.update", "data": data})
+    except Exception as e:
+        # Spectator updates are best effort; the score itself is already saved
+        logger.warning(f"Could not broadcast update for game {game_id}: {e}")
+
+
+def publish_on_commit(game_id, data):
+    transaction.on_commit(lambda: publish(game_id, data))
+
+
+# --- Per-game backlog ---
+def remember(game_id, delta):
+    """Add a delta to the game's backlog, once per seq; the oldest drop off past BACKLOG_SIZE."""
+    seq = delta.get("seq")
+    if seq is None:
+        return
+    with _backlog_lock:
+        backlog = _backlogs.get(game_id)
+        if backlog is None:
+            backlog = _backlogs[game_id] = deque(maxlen=BACKLOG_SIZE)
+        _backlogs.move_to_end(game_id)
+        while len(_backlogs) > MAX_BACKLOG_GAMES:
+            _backlogs.popitem(last=False)
+        if not any(event["seq"] == seq for event in backlog):
+            backlog.append(delta)
+
+
+def missed_deltas(game_id, since, seq):
+    """
+    The deltas that take a viewer at version since to version seq, oldest first,
+    or None when the backlog can't (the caller then sends a snapshot).
+    """
+    if since > seq:
+        return None
+    with _backlog_lock:
+        events = [event for event in _backlogs.get(game_id, ()) if since < event["seq"] <= seq]
+    # Publishes from different workers can arrive out of order
+    events.sort(key=lambda event: event["seq"])
+    if [event["seq"] for event in events] != list(range(since + 1, seq + 1)):
+        return None
+    return events
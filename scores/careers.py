@@ -0,0 +1,324 @@
+# scores/careers.py
+"""
+Maintenance of PlayerGameLine and PlayerCareer.
+
+Whenever a game's scores or lineup change, game_rows_changed() calls
+refresh_player_lines() for that game. It recomputes each player's line for
+the game (a couple of small queries over one game's rows), compares it with
+the stored line and folds the difference into PlayerCareer with F()
+updates. Highest scores can't be decremented, so a career maximum is only
+re-read from the player's lines when a line's maximum went down.
+
+rebuild_careers() recomputes everything from scratch. career_mismatches()
+checks the stored careers against Score/GamePlayer directly, without going
+through the lines.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import GamePlayer, PlayerCareer, PlayerGameLine, Score
+from .totals import game_team_totals
+
+COUNTERS = ("total_score", "cycles", "rolls", "zero_cycles", "zero_rolls")
+MAXIMA = ("highest_cycle_score", "highest_roll_score")
+CAREER_FIELDS = ("games_participated",) + COUNTERS + MAXIMA + ("wins", "losses", "draws")
+RESULT_COUNTERS = {"W": "wins", "L": "losses", "D": "draws"}
+
+
+def _result(own_total, opp_total):
+    if own_total > opp_total:
+        return "W"
+    if own_total < opp_total:
+        return "L"
+    return "D"
+
+
+def _max(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def compute_lines(game_ids):
+    """
+    {(game_id, player_id): line dict} for the given games (None for all), from two queries:
+    scores grouped by (game, player, round) and the lineups. Team totals are
+    worked out from the same rows, using each round's lineup as TeamRoundTotal does.
+    """
+    lineups = GamePlayer.objects.all()
+    scores = Score.objects.all()
+    if game_ids is not None:
+        lineups = lineups.filter(game_id__in=game_ids)
+        scores = scores.filter(game_id__in=game_ids)
+
+    team_by_round = {}
+    lines = {}
+    for game_id, player_id, round_number, team, game_date in (
+        lineups.values_list("game_id", "player_id", "round_number", "team", "game__date").iterator()
+    ):
+        team_by_round[(game_id, player_id, round_number)] = team
+        line = lines.setdefault((game_id, player_id), _empty_line())
+        line["game_date"] = game_date
+        if line["team"] != "own":
+            line["team"] = team
+
+    team_totals = defaultdict(lambda: {"own": 0, "opp": 0})
+    rows = (
+        scores.values("game_id", "player_id", "round_number", "game__date")
+        .annotate(
+            score_sum=Sum("total"),
+            turns=Count("id"),
+            roll_count=Count("roll1") + Count("roll2") + Count("roll3"),
+            zero_turns=Count("id", filter=Q(total=0)),
+            zero_roll_count=(
+                Count("id", filter=Q(roll1=0)) + Count("id", filter=Q(roll2=0)) + Count("id", filter=Q(roll3=0))
+            ),
+            max_total=Max("total"),
+            max_roll1=Max("roll1"),
+            max_roll2=Max("roll2"),
+            max_roll3=Max("roll3"),
+        )
+        .order_by()
+    )
+    for row in rows.iterator():
+        key = (row["game_id"], row["player_id"])
+        line = lines.setdefault(key, _empty_line())
+        line["game_date"] = row["game__date"]
+        line["total_score"] += row["score_sum"] or 0
+        line["cycles"] += row["turns"]
+        line["rolls"] += row["roll_count"]
+        line["zero_cycles"] += row["zero_turns"]
+        line["zero_rolls"] += row["zero_roll_count"]
+        line["highest_cycle_score"] = _max(line["highest_cycle_score"], row["max_total"])
+        line["highest_roll_score"] = _max(
+            line["highest_roll_score"], row["max_roll1"], row["max_roll2"], row["max_roll3"]
+        )
+        team = team_by_round.get((row["game_id"], row["player_id"], row["round_number"]))
+        if team in ("own", "opp"):
+            team_totals[row["game_id"]][team] += row["score_sum"] or 0
+
+    for (game_id, _), line in lines.items():
+        if line["team"] == "own":
+            totals = team_totals[game_id]
+            line["result"] = _result(totals["own"], totals["opp"])
+    return lines
+
+
+def _empty_line():
+    return {
+        "team": "", "total_score": 0, "cycles": 0, "rolls": 0, "zero_cycles": 0, "zero_rolls": 0,
+        "highest_cycle_score": None, "highest_roll_score": None, "result": "", "game_date": None,
+    }
+
+
+def _contribution(line):
+    """What a line adds to the career counters."""
+    if line is None:
+        return {}
+    contribution = {field: line[field] for field in COUNTERS}
+    contribution["games_participated"] = 1 if line["team"] else 0
+    if line["result"]:
+        contribution[RESULT_COUNTERS[line["result"]]] = 1
+    return contribution
+
+
+def _line_values(line_obj):
+    return {field: getattr(line_obj, field) for field in ("team",) + COUNTERS + MAXIMA + ("result", "game_date")}
+
+
+def _max_from_lines(field):
+    lines = PlayerGameLine.objects.filter(player_id=OuterRef("player_id"))
+    return Subquery(lines.values("player_id").annotate(m=Max(field)).values("m")[:1])
+
+
+def _apply_career_changes(old_lines, new_lines):
+    """
+    Fold {player_id: line or None} before/after into PlayerCareer, one UPDATE per distinct change.
+    The stored lines must already be in their new state, since maxima may be re-read from them.
+    """
+    new_players = [pid for pid, line in new_lines.items() if line is not None and old_lines.get(pid) is None]
+    if new_players:
+        PlayerCareer.objects.bulk_create(
+            [PlayerCareer(player_id=pid) for pid in new_players], ignore_conflicts=True,
+        )
+
+    groups = defaultdict(list)
+    for player_id in set(old_lines) | set(new_lines):
+        old, new = old_lines.get(player_id), new_lines.get(player_id)
+        old_contribution, new_contribution = _contribution(old), _contribution(new)
+        delta = tuple(sorted(
+            (field, new_contribution.get(field, 0) - old_contribution.get(field, 0))
+            for field in set(old_contribution) | set(new_contribution)
+            if new_contribution.get(field, 0) != old_contribution.get(field, 0)
+        ))
+        maxima = []
+        for field in MAXIMA:
+            before = old[field] if old else None
+            after = new[field] if new else None
+            if before is not None and (after is None or after < before):
+                maxima.append((field, "recompute"))
+            elif after is not None and after != before:
+                maxima.append((field, after))
+        if delta or maxima:
+            groups[(delta, tuple(maxima))].append(player_id)
+
+    for (delta, maxima), player_ids in groups.items():
+        updates = {field: F(field) + change for field, change in delta}
+        for field, value in maxima:
+            if value == "recompute":
+                updates[field] = _max_from_lines(field)
+            else:
+                updates[field] = Greatest(Coalesce(F(field), Value(value)), Value(value))
+        PlayerCareer.objects.filter(player_id__in=player_ids).update(**updates)
+
+
+def refresh_player_lines(game_id):
+    """Recompute every player's line for one game and apply the differences to their careers."""
+    # Usually already inside the score write's transaction; no savepoint needed
+    with transaction.atomic(savepoint=False):
+        new = {player_id: line for (_, player_id), line in compute_lines([game_id]).items()}
+        stored = {obj.player_id: obj for obj in PlayerGameLine.objects.filter(game_id=game_id)}
+        old = {player_id: _line_values(obj) for player_id, obj in stored.items()}
+
+        changed = [
+            PlayerGameLine(game_id=game_id, player_id=player_id, **line)
+            for player_id, line in new.items() if old.get(player_id) != line
+        ]
+        removed = [player_id for player_id in old if player_id not in new]
+        if not changed and not removed:
+            return
+        if changed:
+            PlayerGameLine.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=["player", "game"],
+                update_fields=["team", *COUNTERS, *MAXIMA, "result", "game_date"],
+            )
+        if removed:
+            PlayerGameLine.objects.filter(game_id=game_id, player_id__in=removed).delete()
+        _apply_career_changes(
+            {pid: old.get(pid) for pid in set(old) | set(new)},
+            {pid: new.get(pid) for pid in set(old) | set(new)},
+        )
+
+
+def forget_game_lines(game_id):
+    """
+    Take a game that is about to be deleted out of its players' careers. The lines are
+    removed here rather than left to the cascade, so that when several games are deleted
+    together no career maximum is re-read from another doomed game's line.
+    """
+    lines = PlayerGameLine.objects.filter(game_id=game_id)
+    old = {obj.player_id: _line_values(obj) for obj in lines}
+    lines.delete()
+    _apply_career_changes(old, {pid: None for pid in old})
+
+
+def rebuild_careers(game_ids=None):
+    """Recompute lines (optionally only for some games) and then every affected career from its lines."""
+    with transaction.atomic():
+        lines_qs = PlayerGameLine.objects.all()
+        if game_ids is not None:
+            lines_qs = lines_qs.filter(game_id__in=game_ids)
+        affected = set(lines_qs.values_list("player_id", flat=True))
+        lines_qs.delete()
+
+        lines = compute_lines(game_ids)
+        PlayerGameLine.objects.bulk_create(
+            [PlayerGameLine(game_id=game_id, player_id=player_id, **line) for (game_id, player_id), line in lines.items()],
+            batch_size=1000,
+        )
+        affected |= {player_id for (_, player_id) in lines}
+
+        careers = {pid: PlayerCareer(player_id=pid) for pid in affected}
+        totals = (
+            PlayerGameLine.objects.filter(player_id__in=affected)
+            .values("player_id")
+            .annotate(
+                games_participated=Count("id", filter=~Q(team="")),
+                **{f"sum_{field}": Sum(field) for field in COUNTERS},
+                **{f"max_{field}": Max(field) for field in MAXIMA},
+                wins=Count("id", filter=Q(result="W")),
+                losses=Count("id", filter=Q(result="L")),
+                draws=Count("id", filter=Q(result="D")),
+            )
+            .order_by()
+        )
+        for row in totals:
+            career = careers[row["player_id"]]
+            career.games_participated = row["games_participated"]
+            for field in COUNTERS:
+                setattr(career, field, row[f"sum_{field}"] or 0)
+            for field in MAXIMA:
+                setattr(career, field, row[f"max_{field}"])
+            career.wins, career.losses, career.draws = row["wins"], row["losses"], row["draws"]
+        PlayerCareer.objects.filter(player_id__in=affected).delete()
+        PlayerCareer.objects.bulk_create(careers.values(), batch_size=1000)
+    return len(careers)
+
+
+def expected_careers(player_ids=None):
+    """
+    Career figures straight from Score and GamePlayer (the way player_statistics used
+    to compute them), for checking the maintained PlayerCareer rows.
+    """
+    scores = Score.objects.all()
+    lineups = GamePlayer.objects.all()
+    if player_ids is not None:
+        scores = scores.filter(player_id__in=player_ids)
+        lineups = lineups.filter(player_id__in=player_ids)
+
+    expected = defaultdict(lambda: {field: 0 for field in CAREER_FIELDS} | {field: None for field in MAXIMA})
+    rows = scores.values("player_id").annotate(
+        score_sum=Sum("total"),
+        turns=Count("id"),
+        roll_count=Count("roll1") + Count("roll2") + Count("roll3"),
+        zero_turns=Count("id", filter=Q(total=0)),
+        zero_roll_count=Count("id", filter=Q(roll1=0)) + Count("id", filter=Q(roll2=0)) + Count("id", filter=Q(roll3=0)),
+        max_total=Max("total"), max_roll1=Max("roll1"), max_roll2=Max("roll2"), max_roll3=Max("roll3"),
+    ).order_by()
+    for row in rows:
+        career = expected[row["player_id"]]
+        career.update({
+            "total_score": row["score_sum"] or 0, "cycles": row["turns"], "rolls": row["roll_count"],
+            "zero_cycles": row["zero_turns"], "zero_rolls": row["zero_roll_count"],
+            "highest_cycle_score": row["max_total"],
+            "highest_roll_score": _max(row["max_roll1"], row["max_roll2"], row["max_roll3"]),
+        })
+
+    games_by_player = defaultdict(set)
+    own_games_by_player = defaultdict(set)
+    for player_id, game_id, team in lineups.values_list("player_id", "game_id", "team"):
+        games_by_player[player_id].add(game_id)
+        if team == "own":
+            own_games_by_player[player_id].add(game_id)
+    totals = game_team_totals(list({g for games in own_games_by_player.values() for g in games}))
+    for player_id, games in games_by_player.items():
+        career = expected[player_id]
+        career["games_participated"] = len(games)
+        for game_id in own_games_by_player[player_id]:
+            result = _result(totals[game_id]["own"], totals[game_id]["opp"])
+            career[RESULT_COUNTERS[result]] += 1
+    return dict(expected)
+
+
+def career_mismatches(player_ids=None):
+    """[(player_id, field, stored, expected)] for every career figure that disagrees with the raw rows."""
+    expected = expected_careers(player_ids)
+    stored = PlayerCareer.objects.all()
+    if player_ids is not None:
+        stored = stored.filter(player_id__in=player_ids)
+    stored = {career.player_id: career for career in stored}
+
+    mismatches = []
+    empty = {field: 0 for field in CAREER_FIELDS} | {field: None for field in MAXIMA}
+    for player_id in set(expected) | set(stored):
+        want = expected.get(player_id, empty)
+        career = stored.get(player_id)
+        for field in CAREER_FIELDS:
+            have = getattr(career, field) if career else empty[field]
+            if have != want[field]:
+                mismatches.append((player_id, field, have, want[field]))
+    return sorted(mismatches)
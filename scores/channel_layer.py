@@ -0,0 +1,136 @@
+# scores/channel_layer.py
+"""
+A channel layer that reaches every worker process through the database.
+
+InMemoryChannelLayer only delivers within one process. With several
+gunicorn/uvicorn workers, a group_send from the worker that saved a score never
+reached sockets held by the others. DatabaseChannelLayer keeps the in-memory
+layer for everything local: channels, group membership and same-process
+delivery. It also writes each group_send to the ChannelEvent table. Every
+process with group members polls that table and delivers other workers'
+events to its own members.
+
+It polls rather than using Postgres LISTEN/NOTIFY. The production database
+sits behind a transaction-mode pooler, where a LISTEN session can't be held,
+and SQLite has no notifications at all. The poll is one range query on the
+primary key. It runs every poll_interval while events are flowing and backs
+off to max_poll_interval when idle. When ids arrive out of order (a
+concurrent insert that committed late), the skipped ids are rechecked for a
+few seconds, so a late commit is still delivered. A process starts polling
+from the highest id as of just before its first member joined, so an event
+sent between the join and the first poll is still delivered.
+
+Only groups cross processes. send() to a specific channel stays process-local,
+which is all the app needs because consumers reply on their own socket.
+Group messages must be JSON-serialisable. Events are deleted after `expiry`
+seconds.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.layers import InMemoryChannelLayer
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import ChannelEvent
+
+logger = logging.getLogger(__name__)
+
+GAP_TIMEOUT = 5  # Seconds to keep looking for an id skipped by an out-of-order commit
+
+
+class DatabaseChannelLayer(InMemoryChannelLayer):
+    def __init__(self, poll_interval=0.05, max_poll_interval=0.5, batch_size=500, **kwargs):
+        super().__init__(**kwargs)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.batch_size = batch_size
+        self.origin = uuid.uuid4().hex  # Our own events were delivered locally when sent
+        self._poller = None
+        self._last_id = None
+        self._gaps = {}  # Skipped id -> time to give up on it
+        self._last_cleanup = time.monotonic()
+
+    # --- Groups extension ---
+
+    async def group_add(self, group, channel):
+        if not self._polling():
+            # Take the starting point before the member joins: anything sent after it has joined
+            # has a higher id, so the first poll can't skip it
+            mark = await database_sync_to_async(self._high_water_mark, thread_sensitive=False)()
+            if not self._polling():  # Unless another group_add started the poller meanwhile
+                self._last_id = mark
+                self._gaps = {}
+                await super().group_add(group, channel)
+                self._poller = asyncio.get_running_loop().create_task(self._poll())
+                return
+        await super().group_add(group, channel)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        assert self.valid_group_name(group), "Invalid group name"
+        # Thread-sensitive, so a caller inside a transaction publishes when it commits
+        await sync_to_async(self._insert)(group, message)
+        await super().group_send(group, message)
+
+    async def flush(self):
+        await super().flush()
+        await sync_to_async(self._delete_all)()
+
+    # --- Polling ---
+
+    def _polling(self):
+        loop = asyncio.get_running_loop()
+        return self._poller is not None and not self._poller.done() and self._poller.get_loop() is loop
+
+    def _high_water_mark(self):
+        return ChannelEvent.objects.aggregate(last=Max("id"))["last"] or 0
+
+    async def _poll(self):
+        # Off the thread-sensitive executor, so polling never queues behind request work
+        fetch = database_sync_to_async(self._fetch, thread_sensitive=False)
+        interval = self.poll_interval
+        while self.groups:
+            try:
+                events = await fetch()
+            except Exception as e:
+                logger.warning(f"Channel layer poll failed: {e}")
+                events = []
+            for origin, group, message in events:
+                if origin != self.origin and group in self.groups:
+                    await super().group_send(group, message)
+            interval = self.poll_interval if events else min(interval * 2, self.max_poll_interval)
+            await asyncio.sleep(interval)
+
+    def _fetch(self):
+        now = time.monotonic()
+        self._gaps = {event_id: until for event_id, until in self._gaps.items() if until > now}
+        condition = Q(id__gt=self._last_id)
+        if self._gaps:
+            condition |= Q(id__in=list(self._gaps))
+        rows = list(
+            ChannelEvent.objects.filter(condition).order_by("id")
+            .values_list("id", "origin", "group_name", "message")[:self.batch_size]
+        )
+        for event_id, *_ in rows:
+            if event_id > self._last_id:
+                for skipped in range(self._last_id + 1, event_id):
+                    self._gaps[skipped] = now + GAP_TIMEOUT
+                self._last_id = event_id
+            else:
+                self._gaps.pop(event_id, None)
+        if now - self._last_cleanup > self.expiry:
+            self._last_cleanup = now
+            ChannelEvent.objects.filter(created__lt=timezone.now() - timedelta(seconds=self.expiry)).delete()
+        return [row[1:] for row in rows]
+
+    def _insert(self, group, message):
+        ChannelEvent.objects.create(group_name=group, message=message, origin=self.origin)
+
+    def _delete_all(self):
+        ChannelEvent.objects.all().delete()
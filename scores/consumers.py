@@ -1,26 +1,239 @@
 # scores/consumers.py
+"""
+ws/game/<id>/: live deltas for everyone watching a game, and score entry for staff.
+
+A staff scorer can send a turn over the open socket instead of POSTing it:
+
+    {"action": "score", "roll1": 3, "roll2": 4, "roll3": 0, "turn": 12, "ref": 7}
+
+The turn is checked by validate_turns, as on the HTTP paths, and saved by
+record_turns in a database thread. The round state is built once, under
+record_turns' lock, not once before it as well. The scorer gets an "ack"
+with the same fields as live_game's AJAX reply. record_turns' on-commit
+publish sends the delta to the game's group during that same call.
+
+"turn" is the cursor the client thinks it is at, so a turn resent after a
+dropped connection is refused (409) rather than stored twice. "ref" is
+echoed back so acks can be matched to sends.
+
+Every viewer is caught up on connect. A client that reconnects with
+?since=<seq> gets just the deltas it missed, from the backlog in
+scores/broadcast.py. A first-time client, or one the backlog can't serve,
+gets a snapshot of the round with its seq. A client that sees a gap in the
+seqs of live deltas sends {"action": "sync", "since": <seq>} and is caught up
+the same way.
+
+Group deltas are never sent from the handler that receives them. game_update
+only queues them on the connection's outbox. A writer task per connection
+waits LIVE_UPDATE_WINDOW seconds after the first one, so a burst (several
+quick scores, or a replayed offline queue) goes out as one
+{"type": "batch", "events": [...]} frame. If the client can't keep up and
+the outbox passes LIVE_UPDATE_QUEUE events, the queued deltas are dropped
+and the writer sends one fresh snapshot instead. A slow socket therefore
+only ever delays its own updates. Acks are sent directly rather than
+through the outbox, so they never wait behind a batch.
+
+Both of these are per worker process. With DatabaseChannelLayer
+(scores/channel_layer.py) every worker receives every delta for the groups
+its sockets are in and coalesces it separately for each of its connections.
+Batching saves frames and client work, not the per-worker fan-out.
+connection_counts() only sees the sockets of the process it runs in; there
+is no cross-worker total.
+"""
+import asyncio
 import json
+import logging
+from collections import Counter
+from urllib.parse import parse_qs
+
+from django.conf import settings
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.urls import reverse
+
+from .broadcast import game_group_name, missed_deltas, remember
+from .models import Game, GameProgress
+from .scoring import ROLL_FIELDS, TurnError, record_turns, score_payload, score_snapshot, validate_turns
+from .state import get_round_state
+
+logger = logging.getLogger(__name__)
+
+_connections = Counter()  # Group name -> open sockets in this process
+
+
+def connection_counts():
+    """
+    {group name: open sockets} for this worker process only. Under several workers each
+    holds its own share of the sockets, and these counts are not added up anywhere.
+    """
+    return {group: count for group, count in _connections.items() if count}
+
+
+def _parse_seq(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
 
 class GameConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.game_id = self.scope['url_route']['kwargs']['game_id']
-        self.group_name = f"game_{self.game_id}"
+        self.game_id = int(self.scope['url_route']['kwargs']['game_id'])
+        self.seq = None  # Latest seq this client has been sent (or queued)
+        self.outbox = []
+        self.outbox_ready = asyncio.Event()
+        self.needs_snapshot = False
+        self.window = getattr(settings, "LIVE_UPDATE_WINDOW", 0.05)
+        self.max_queued = getattr(settings, "LIVE_UPDATE_QUEUE", 50)
+        self.writer = None
+        self.group_name = game_group_name(self.game_id)
+        # Same rule as staff_member_required on the HTTP scoring views; the user is resolved by AuthMiddlewareStack
+        user = self.scope.get('user')
+        self.can_score = bool(user and user.is_active and user.is_staff)
         # Join game group
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
+        # After joining, so no delta committed from here on can fall between the catch-up and the group
+        since = parse_qs(self.scope.get('query_string', b'').decode()).get('since', [None])[0]
+        await self.catch_up(_parse_seq(since))
+        _connections[self.group_name] += 1
+        self.writer = asyncio.create_task(self.write_updates())
 
     async def disconnect(self, close_code):
         # Leave game group
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if self.writer is not None:
+            self.writer.cancel()
+            _connections[self.group_name] -= 1
+            if _connections[self.group_name] <= 0:
+                del _connections[self.group_name]
+
+    # Receive message from WebSocket
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or "")
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            await self.send(text_data=json.dumps({"type": "error", "error": "Messages must be JSON objects."}))
+            return
+        if data.get("action") == "score":
+            await self.receive_score(data)
+        elif data.get("action") == "sync":
+            await self.catch_up(_parse_seq(data.get("since")))
+
+    # --- Catch-up (snapshot or missed deltas) ---
+    async def catch_up(self, since):
+        events, seq = await self.load_catch_up(since)
+        for event in events:
+            await self.send(text_data=json.dumps(event))
+        if seq is not None:
+            self.seq = seq
 
-    # Receive message from WebSocket (if needed)
-    async def receive(self, text_data):
-        data = json.loads(text_data)
-        # Here you could handle client messages if needed.
-        pass
+    @database_sync_to_async
+    def load_catch_up(self, since):
+        """([deltas since `since`] or [snapshot], seq they bring the client up to)."""
+        game = Game.objects.select_related("progress").filter(pk=self.game_id).first()
+        if game is None:
+            return [], None
+        if since is not None:
+            events = missed_deltas(game.id, since, game.version)
+            if events is not None:
+                return events, game.version
+        progress = GameProgress.for_game(game)
+        state = get_round_state(game, progress.current_round, progress.team_first)
+        return [score_snapshot(state)], state.version
 
-    # Receive update from group
+    async def receive_score(self, data):
+        ref = data.get("ref")
+        if not self.can_score:
+            await self.send_ack(ref, success=False, error="Only staff can enter scores.", status=403)
+            return
+
+        rolls, errors = validate_turns([{field: data.get(field) for field in ROLL_FIELDS}])
+        if errors:
+            await self.send_ack(ref, success=False, error="Validation failed.", errors=errors[0], status=400)
+            return
+        try:
+            start_turn = int(data["turn"]) if data.get("turn") is not None else None
+        except (TypeError, ValueError):
+            await self.send_ack(ref, success=False, error="turn must be an integer.", status=400)
+            return
+
+        try:
+            result = await self.save_turn(rolls[0], start_turn)
+        except Game.DoesNotExist:
+            await self.send_ack(ref, success=False, error="Game not found.", status=404)
+            return
+        except TurnError as e:
+            await self.send_ack(ref, success=False, error=e.message, round_complete=e.round_complete, status=e.status)
+            return
+        except Exception as e:
+            logger.error(f"WebSocket error saving score for game {self.game_id}: {e}", exc_info=True)
+            await self.send_ack(ref, success=False, error="Error saving score data.", status=500)
+            return
+        await self.send_ack(ref, success=True, **result)
+
+    @database_sync_to_async
+    def save_turn(self, rolls, start_turn):
+        """Record one turn for the round in play; returns the ack fields (as live_game's AJAX success reply)."""
+        game = Game.objects.select_related("progress").get(pk=self.game_id)
+        progress = GameProgress.for_game(game)
+        round_state, (score,) = record_turns(
+            game, progress.current_round, progress.team_first, [rolls], start_turn=start_turn,
+        )
+        logger.info(f"Score saved over WebSocket: Game {game.id}, R{progress.current_round}, C{score.cycle_number}, P{score.player.id}")
+        new_state = round_state.as_dict()
+        return {
+            "message": new_state["message"],
+            "plus_minus": new_state["plus_minus"],
+            "new_score": score_payload(score),
+            "next_turn": round_state.cursor,
+            "round_complete": new_state["round_complete"],
+            "current_round": progress.current_round,
+            "round_complete_url": reverse("round_complete", args=[game.id]) if new_state["round_complete"] else None,
+        }
+
+    async def send_ack(self, ref, **fields):
+        await self.send(text_data=json.dumps({"type": "ack", "ref": ref, **fields}))
+
+    # Receive update from group (published by scores.broadcast after each committed score write)
     async def game_update(self, event):
-        # event should be a dict with update info
-        await self.send(text_data=json.dumps(event["data"]))
+        # event["data"] is the compact delta built by scores.scoring.score_delta
+        data = event["data"]
+        remember(self.game_id, data)
+        if self.seq is not None and data.get("seq") is not None:
+            if data["seq"] <= self.seq:
+                return  # Already covered by the catch-up
+            self.seq = data["seq"]
+        if self.needs_snapshot:
+            return  # The snapshot on its way will include it
+        if len(self.outbox) >= self.max_queued:
+            # Falling behind: the intermediate states no longer matter, only where the round is now
+            self.outbox.clear()
+            self.needs_snapshot = True
+        else:
+            self.outbox.append(data)
+        self.outbox_ready.set()
+
+    # --- Outbox writer (one per connection) ---
+    async def write_updates(self):
+        while True:
+            await self.outbox_ready.wait()
+            await asyncio.sleep(self.window)  # Let the rest of a burst arrive
+            self.outbox_ready.clear()
+            if self.needs_snapshot:
+                self.needs_snapshot = False  # Deltas from here on queue again, and are filtered below
+                events, seq = await self.load_catch_up(None)
+                if seq is not None:
+                    self.seq = max(self.seq or 0, seq)
+                    # Deltas queued while it loaded are only news if they are newer than it
+                    self.outbox = [event for event in self.outbox if event.get("seq", seq + 1) > seq]
+                for event in events:
+                    await self.send(text_data=json.dumps(event))
+            if not self.outbox:
+                continue
+            events, self.outbox = self.outbox, []
+            frame = events[0] if len(events) == 1 else {"type": "batch", "events": events}
+            await self.send(text_data=json.dumps(frame))
@@ -0,0 +1,125 @@
+# scores/export.py
+"""
+Streaming export of every turn, with its game, opponent, location and team.
+
+The production database sits behind a transaction-mode pooler, so settings
+turn server-side cursors off and a plain .iterator() would pull the whole
+result set into memory. Rows are instead read in keyset chunks on
+(game_id, id): each chunk is an ordinary bounded query that seeks, through
+the Score (game, id) index, to just after the last row of the previous one. Memory is flat however long the history,
+and no cursor or transaction is held open between chunks.
+
+Under ASGI a StreamingHttpResponse over a sync iterator is first drained
+into a list, so export_scores streams aexport_text() instead: an async
+generator that fetches each keyset chunk in a thread and yields its text
+before the next query runs.
+
+The columns match what scores/importer.py reads, with each game's turns
+together and in play order, so an export can be imported elsewhere as is.
+"""
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+
+from .models import Score
+from .totals import lineup_team
+
+DEFAULT_CHUNK_SIZE = 2000
+FIELDS = (
+    "game", "date", "opponent", "location", "game_type", "cycles_per_round", "team_first",
+    "round", "cycle", "team", "player", "roll1", "roll2", "roll3", "total",
+)
+_COLUMNS = (
+    "id", "game_id", "game__date", "game__opponent__name", "game__location__name", "game__game_type__name",
+    "game__cycles_per_round", "game__team_first",
+    "round_number", "cycle_number", "team", "player__name", "roll1", "roll2", "roll3", "total",
+)
+
+
+def filtered_scores(date_from=None, date_to=None, opponent_id=None, player_id=None):
+    scores = Score.objects.all()
+    if date_from:
+        scores = scores.filter(game__date__gte=date_from)
+    if date_to:
+        scores = scores.filter(game__date__lte=date_to)
+    if opponent_id:
+        scores = scores.filter(game__opponent_id=opponent_id)
+    if player_id:
+        scores = scores.filter(player_id=player_id)
+    return scores
+
+
+def export_rows(scores, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one dict per turn (keys FIELDS), reading the queryset in keyset chunks."""
+    for chunk in export_chunks(scores, chunk_size):
+        yield from chunk
+
+
+def export_chunks(scores, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield a list of row dicts (keys FIELDS) per keyset chunk; one query each."""
+    rows = scores.annotate(team=lineup_team()).order_by("game_id", "id").values_list(*_COLUMNS)
+    last = None
+    while True:
+        chunk = rows
+        if last is not None:
+            # The game_id >= bound is what lets the (game, id) index seek; the OR alone would scan from the start
+            chunk = chunk.filter(Q(game_id__gte=last[0]), Q(game_id__gt=last[0]) | Q(id__gt=last[1]))
+        chunk = list(chunk[:chunk_size])
+        if chunk:
+            yield [
+                {
+                    "game": game_id, "date": game_date.isoformat(), "opponent": opponent,
+                    "location": location, "game_type": game_type, "cycles_per_round": cycles_per_round,
+                    "team_first": team_first, "round": round_number, "cycle": cycle, "team": team,
+                    "player": player, "roll1": roll1, "roll2": roll2, "roll3": roll3, "total": total,
+                }
+                for (_, game_id, game_date, opponent, location, game_type, cycles_per_round, team_first,
+                     round_number, cycle, team, player, roll1, roll2, roll3, total) in chunk
+            ]
+        if len(chunk) < chunk_size:
+            return
+        last = (chunk[-1][1], chunk[-1][0])
+
+
+def csv_lines(rows, header=True):
+    """CSV text (header first, unless header is False) for export_rows(), one line at a time."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    if header:
+        writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():  # Header only, when there were no rows
+        yield buffer.getvalue()
+
+
+def ndjson_lines(rows, header=True):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+async def aexport_text(write_lines, scores, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Async iterator of export text, one string per keyset chunk. Each chunk's query runs
+    in a thread (sync_to_async) only after the previous chunk has been yielded.
+    """
+    chunks = export_chunks(scores, chunk_size)
+    next_chunk = sync_to_async(next)
+    first = True
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield "".join(write_lines(chunk, header=first))
+        first = False
+    if first:
+        yield "".join(write_lines([]))  # No rows: just the CSV header
+
+
+FORMATS = {
+    "csv": (csv_lines, "text/csv"),
+    "ndjson": (ndjson_lines, "application/x-ndjson"),
+}
@@ -3,6 +3,7 @@ from django import forms
 from django.forms import modelformset_factory
 # Add Opponent to imports
 from .models import Game, Score, GamePlayer, Player, Opponent, Location, GameType
+from .rules import RULES
 
 
 class GameSetupForm(forms.ModelForm):
@@ -82,15 +83,15 @@ class ScoreForm(forms.ModelForm):
     """
     # Define fields explicitly for validation control using IntegerField
     roll1 = forms.IntegerField(
-        min_value=0, max_value=9, required=True,
+        min_value=0, max_value=RULES.pins, required=True,
         widget=forms.NumberInput(attrs={'class': 'form-control form-control-lg text-center', 'placeholder': 'R1', 'aria-label': 'Roll 1', 'inputmode': 'numeric', 'pattern': '[0-9]*'})
     )
     roll2 = forms.IntegerField(
-        min_value=0, max_value=9, required=True,  # Changed to required=True
+        min_value=0, max_value=RULES.pins, required=True,  # Changed to required=True
         widget=forms.NumberInput(attrs={'class': 'form-control form-control-lg text-center', 'placeholder': 'R2', 'aria-label': 'Roll 2', 'inputmode': 'numeric', 'pattern': '[0-9]*'})
     )
     roll3 = forms.IntegerField(
-        min_value=0, max_value=9, required=True,  # Changed to required=True
+        min_value=0, max_value=RULES.pins, required=True,  # Changed to required=True
         widget=forms.NumberInput(attrs={'class': 'form-control form-control-lg text-center', 'placeholder': 'R3', 'aria-label': 'Roll 3', 'inputmode': 'numeric', 'pattern': '[0-9]*'})
     )
 
@@ -120,37 +121,9 @@ class ScoreForm(forms.ModelForm):
         if roll1 is None or roll2 is None or roll3 is None:
             return cleaned_data
 
-        # --- Rule: Roll 2 Validation ---
-        # Determine pins standing before Roll 2, considering reset
-        pins_standing_before_roll2 = 9 if roll1 == 9 else (9 - roll1) # Reset ONLY if roll1 was 9
-        
-        # Validate roll2 value against pins standing
-        if roll2 > pins_standing_before_roll2:
-            self.add_error('roll2', f"Roll 2 score ({roll2}) cannot exceed pins standing ({pins_standing_before_roll2}) based on Roll 1.")
-
-        # --- Rule: Roll 3 Validation ---
-        # Determine pins standing before Roll 3, considering resets
-        pins_standing_before_roll3 = 9 # Default: Assume reset happened before R3
-
-        reset_before_roll2 = (roll1 == 9)
-
-        if reset_before_roll2:
-            # Pins reset before R2. Did R2 clear the *new* rack?
-            if roll2 < 9:
-                # R2 did NOT clear the new rack, no reset before R3
-                pins_standing_before_roll3 = 9 - roll2
-            # Else (roll1==9 and roll2==9), pins reset again, pins_standing_before_roll3 remains 9.
-        else: # No reset before R2 (roll1 < 9)
-            # Did R1+R2 clear the original rack?
-            cumulative_r1_r2 = roll1 + roll2
-            if cumulative_r1_r2 < 9:
-                # Cumulative didn't clear, no reset before R3
-                pins_standing_before_roll3 = 9 - cumulative_r1_r2
-            # Else (roll1 < 9 and cumulative_r1_r2 >= 9), pins WERE reset before R3, pins_standing_before_roll3 remains 9.
-
-        # Validate roll 3 value against calculated standing pins
-        if roll3 > pins_standing_before_roll3:
-            self.add_error('roll3', f"Roll 3 score ({roll3}) cannot exceed pins standing ({pins_standing_before_roll3}) based on Rolls 1 & 2.")
+        # --- Rules: each roll is capped by the pins standing (scores/rules.py) ---
+        for roll_number, message in RULES.errors((roll1, roll2, roll3)):
+            self.add_error(f'roll{roll_number}', message)
 
         # Return cleaned_data. Validity is determined by whether errors were added.
         return cleaned_data
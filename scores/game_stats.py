@@ -0,0 +1,112 @@
+# scores/game_stats.py
+"""
+The game_statistics payload.
+
+Everything on the page is derived from one grouped query over
+(round, cycle, player, team) and assembled in Python. The result is cached
+under the game's version, which every Score/GamePlayer change bumps, so a
+finished game is aggregated once and later views only load the Game row.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from .models import Score
+from .totals import lineup_team
+
+CACHE_TIMEOUT = 60 * 60 * 24 * 7  # Superseded versions simply age out
+
+
+def cache_key(game):
+    return f"game_stats:{game.id}:v{game.version}"
+
+
+def _result(own_total, opp_total):
+    if own_total > opp_total:
+        return {"result": "Win", "color": "green"}
+    if own_total < opp_total:
+        return {"result": "Loss", "color": "red"}
+    return {"result": "Draw", "color": "gray"}
+
+
+def build_game_stats(game):
+    rows = (
+        Score.objects.filter(game_id=game.id)
+        .annotate(team=lineup_team())
+        .values("round_number", "cycle_number", "player_id", "player__name", "team")
+        .annotate(group_total=Sum("total"), turns=Count("id"))
+        .order_by()
+    )
+
+    players = {}
+    round_totals = defaultdict(int)
+    cycle_totals = defaultdict(int)
+    round_team_totals = defaultdict(int)
+    for row in rows:
+        player = players.setdefault(row["player_id"], {
+            "player__id": row["player_id"], "player__name": row["player__name"],
+            "total_score": 0, "num_cycles": 0, "teams": set(),
+        })
+        player["total_score"] += row["group_total"]
+        player["num_cycles"] += row["turns"]
+        if row["team"]:
+            player["teams"].add(row["team"])
+            round_team_totals[(row["round_number"], row["team"])] += row["group_total"]
+        round_totals[row["round_number"]] += row["group_total"]
+        cycle_totals[row["cycle_number"]] += row["group_total"]
+
+    for player in players.values():
+        player["player_total"] = player["total_score"]
+        player["average"] = player["total_score"] / player["num_cycles"] if player["num_cycles"] else 0.0
+
+    own_total = sum(t for (_, team), t in round_team_totals.items() if team == "own")
+    opp_total = sum(t for (_, team), t in round_team_totals.items() if team == "opp")
+
+    player_stats = sorted(players.values(), key=lambda p: (-p["total_score"], p["player__name"]))
+    highest_total = max((p["total_score"] for p in player_stats), default=0)
+
+    # Pair each own player with "Opp. <name>"
+    by_name = sorted(players.values(), key=lambda p: p["player__name"])
+    own_players = [p for p in by_name if "own" in p["teams"]]
+    opp_by_name = {p["player__name"]: p for p in by_name if "opp" in p["teams"]}
+    zipped_totals = []
+    for own in own_players:
+        zipped_totals.append({"own": own, "opp": opp_by_name.pop(f"Opp. {own['player__name']}", None)})
+    zipped_totals += [{"own": None, "opp": opp} for opp in opp_by_name.values()]
+
+    max_round = max((r for (r, _) in round_team_totals), default=0)
+    round_diffs = []
+    for r in range(1, max_round + 1):
+        own_total_r = round_team_totals.get((r, "own"), 0)
+        opp_total_r = round_team_totals.get((r, "opp"), 0)
+        round_diffs.append({
+            "round_number": r,
+            "own_total": own_total_r,
+            "opp_total": opp_total_r,
+            "differential": own_total_r - opp_total_r,
+        })
+
+    for player in players.values():
+        del player["teams"]
+    return {
+        "cycle_totals": [{"cycle_number": c, "cycle_total": cycle_totals[c]} for c in sorted(cycle_totals)],
+        "round_totals": [{"round_number": r, "round_total": round_totals[r]} for r in sorted(round_totals)],
+        "own_total": own_total,
+        "opp_total": opp_total,
+        "overall_result": _result(own_total, opp_total),
+        "player_stats": player_stats,
+        "highest_scorers": [p["player__id"] for p in player_stats if p["total_score"] == highest_total],
+        "round_diffs": round_diffs,
+        "zipped_totals": zipped_totals,
+    }
+
+
+def get_game_stats(game):
+    """The stats payload for game at its current version, from the cache when possible."""
+    key = cache_key(game)
+    stats = cache.get(key)
+    if stats is None:
+        stats = build_game_stats(game)
+        cache.set(key, stats, CACHE_TIMEOUT)
+    return stats
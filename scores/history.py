@@ -0,0 +1,128 @@
+# scores/history.py
+"""
+Keyset pagination of game histories, newest first: a player's games, and the
+past games feed.
+
+A player's history is read from PlayerGameLine, which carries a copy of the
+game date and is indexed on (player, -game_date, -game). A page is "the next N lines after
+this (date, game id)", so fetching it is one index range scan of N + 1 rows
+whatever the length of the history or how deep the page is; there is no
+OFFSET and no COUNT.
+
+The past games feed pages Game itself on (-date, -id) over the game_date_id_idx
+index, with the opponent/location/result filters applied in the same query.
+
+Cursors are opaque to clients: an encoded (date, game id) of the row the page
+starts after (next) or before (prev).
+"""
+import base64
+import binascii
+from datetime import date
+
+from django.db.models import Q
+
+from .models import Game, PlayerGameLine
+from .totals import annotate_game_results
+
+DEFAULT_PAGE_SIZE = 5
+MAX_PAGE_SIZE = 50
+DEFAULT_FEED_SIZE = 20
+MAX_FEED_SIZE = 100
+RESULTS = ("Win", "Loss", "Draw")
+DIRECTIONS = ("next", "prev")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(game_date, game_id):
+    raw = f"{game_date.isoformat()}.{game_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(date, game_id) from a cursor; raises InvalidCursor for anything we didn't issue."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        day, game_id = raw.split(".")
+        return date.fromisoformat(day), int(game_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+def player_history_page(player_id, cursor=None, direction="next", limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of the games the player scored in, newest first. "next" walks towards
+    older games from the cursor, "prev" back towards newer ones.
+
+    Returns {"games": [...], "next_cursor": str|None, "prev_cursor": str|None}.
+    """
+    if direction not in DIRECTIONS:
+        raise InvalidCursor(f"Unknown direction {direction!r}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    lines = PlayerGameLine.objects.filter(player_id=player_id, cycles__gt=0)
+    if cursor is not None:
+        game_date, game_id = decode_cursor(cursor)
+        if direction == "next":
+            lines = lines.filter(Q(game_date__lt=game_date) | Q(game_date=game_date, game_id__lt=game_id))
+        else:
+            lines = lines.filter(Q(game_date__gt=game_date) | Q(game_date=game_date, game_id__gt=game_id))
+    ordering = ("-game_date", "-game_id") if direction == "next" else ("game_date", "game_id")
+    rows = list(
+        lines.order_by(*ordering).values(
+            "game_id", "game_date", "game__opponent__name", "game__location__name", "total_score", "cycles",
+        )[:limit + 1]
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+
+    games = [
+        {
+            "game__id": row["game_id"],
+            "game__date": row["game_date"],
+            "game__opponent__name": row["game__opponent__name"],
+            "game__location__name": row["game__location__name"],
+            "game_avg": round(row["total_score"] / row["cycles"], 2),
+        }
+        for row in rows
+    ]
+    # Coming from a cursor means there is a page on the side we came from
+    has_next = more if direction == "next" else cursor is not None
+    has_prev = more if direction == "prev" else cursor is not None
+    return {
+        "games": games,
+        "next_cursor": encode_cursor(rows[-1]["game_date"], rows[-1]["game_id"]) if rows and has_next else None,
+        "prev_cursor": encode_cursor(rows[0]["game_date"], rows[0]["game_id"]) if rows and has_prev else None,
+    }
+
+
+def games_feed_page(cursor=None, limit=DEFAULT_FEED_SIZE, opponent_id=None, location_id=None, result=None):
+    """
+    One page of past games older than the cursor, newest first, with totals and result.
+
+    Returns {"games": [Game, ...], "next_cursor": str|None}; each game carries
+    own_total, opp_total and result annotations.
+    """
+    limit = max(1, min(limit, MAX_FEED_SIZE))
+    games = annotate_game_results(Game.objects.select_related("opponent", "location", "game_type"))
+    if opponent_id:
+        games = games.filter(opponent_id=opponent_id)
+    if location_id:
+        games = games.filter(location_id=location_id)
+    if result in RESULTS:
+        games = games.filter(result=result)
+    if cursor is not None:
+        game_date, game_id = decode_cursor(cursor)
+        games = games.filter(Q(date__lt=game_date) | Q(date=game_date, id__lt=game_id))
+
+    page = list(games.order_by("-date", "-id")[:limit + 1])
+    more = len(page) > limit
+    page = page[:limit]
+    return {
+        "games": page,
+        "next_cursor": encode_cursor(page[-1].date, page[-1].id) if more else None,
+    }
@@ -0,0 +1,319 @@
+# scores/importer.py
+"""
+Streaming import of historical results from CSV or NDJSON.
+
+The input is one record per turn, grouped by game:
+
+    game, date, opponent, location, game_type, round, cycle, team, player, roll1, roll2, roll3
+
+plus optional cycles_per_round and team_first, read from a game's first row.
+"game" is any reference that is unique within the file. Lineups are inferred
+from who bowled for which team in each round. location and game_type may be
+blank.
+
+Rows are read lazily and only the game being read and the current batch are
+held in memory, so a million-row file runs in flat memory. The game must
+stay contiguous in the file for that to work.
+Every turn is checked against the Somerset rules table (scores/rules.py):
+a batch's turns are checked together with one RULES.valid_mask lookup just
+before it is written, and only a rejected turn (or rolls that aren't plain
+integers) goes through ScoreForm for its error messages, memoised per
+distinct raw (roll1, roll2, roll3). A rules error is therefore reported
+when its batch is flushed, after any other kind of error in the same batch.
+Names are resolved through an in-memory cache that is filled once per
+batch: one lookup and one bulk insert per model for the names it hasn't seen.
+
+Each batch of games is written in its own transaction with bulk_create, and
+the derived tables (round totals, player lines and careers) are rebuilt for
+those games. The ImportCheckpoint row is updated in that same transaction,
+so it can never be ahead of or behind the games actually committed. An
+interrupted import resumes after the last committed game; it re-reads the
+file but writes nothing for the rows already done.
+"""
+import csv
+import json
+import os
+import time
+from datetime import date
+
+from django.db import transaction
+
+from .careers import rebuild_careers
+from .forms import ScoreForm
+from .models import Game, GamePlayer, GameType, ImportCheckpoint, Location, Opponent, Player, Score
+from .rules import RULES
+from .totals import TEAMS, rebuild_round_totals
+
+REQUIRED_FIELDS = ("game", "date", "opponent", "round", "cycle", "team", "player", "roll1", "roll2", "roll3")
+DEFAULT_BATCH_SIZE = 5000  # Turns per transaction
+
+
+class ImportRowError(ValueError):
+    def __init__(self, line, message):
+        super().__init__(f"Row {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+def read_rows(path):
+    """Yield (line number, row dict) from a .csv or .ndjson/.jsonl file, lazily."""
+    with open(path, newline="", encoding="utf-8") as handle:
+        if path.endswith((".ndjson", ".jsonl")):
+            for line, text in enumerate(handle, start=1):
+                if text.strip():
+                    try:
+                        yield line, json.loads(text)
+                    except json.JSONDecodeError as exc:
+                        raise ImportRowError(line, f"invalid JSON ({exc.msg})") from exc
+        else:
+            # Header is line 1
+            for line, row in enumerate(csv.DictReader(handle), start=2):
+                yield line, row
+
+
+class NameCache:
+    """name -> id for one model, filled in bulk for a batch's unseen names."""
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = {}
+
+    def resolve(self, names):
+        missing = {name for name in names if name and name not in self.ids}
+        if not missing:
+            return
+        found = dict(self.model.objects.filter(name__in=missing).values_list("name", "id"))
+        self.model.objects.bulk_create(
+            [self.model(name=name) for name in missing - set(found)], ignore_conflicts=True,
+        )
+        if len(found) < len(missing):
+            found.update(self.model.objects.filter(name__in=missing - set(found)).values_list("name", "id"))
+        self.ids.update(found)
+
+    def get(self, name):
+        return self.ids.get(name) if name else None
+
+
+class _PendingGame:
+    def __init__(self, ref, line, row):
+        self.ref = ref
+        self.line = line
+        self.date = row["date"]
+        self.opponent = row["opponent"]
+        self.location = row.get("location") or ""
+        self.game_type = row.get("game_type") or ""
+        self.cycles_per_round = int(row["cycles_per_round"]) if row.get("cycles_per_round") else None
+        # Anything but an explicit no means the own team went first, as for a new game
+        self.team_first = str(row.get("team_first", "")).strip().lower() not in ("0", "false", "no", "opp")
+        self.lineup = {}  # (round, player) -> team
+        self.turns = []  # (round, cycle, player, roll1, roll2, roll3)
+        self.lines = []  # File line of each turn, for errors
+
+
+class ResultsImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, checkpoint=None, progress=None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.checkpoint = checkpoint  # ImportCheckpoint name; None keeps no checkpoint
+        self.progress = progress or (lambda message: None)
+        self.names = {model: NameCache(model) for model in (Opponent, Location, GameType, Player)}
+        self._turn_checks = {}
+        self._seen_refs = set()
+        self.rows = self.games = self.turns = 0
+        self._earlier_games = self._earlier_turns = 0  # Committed by earlier runs, from the checkpoint
+        self._started = None
+
+    # --- Validation ---
+
+    def _parse_rolls(self, line, row):
+        """The row's rolls as ints; the rules are checked per batch by _check_rules."""
+        key = (row.get("roll1"), row.get("roll2"), row.get("roll3"))
+        try:
+            rolls = tuple(int(value) for value in key)
+        except (TypeError, ValueError):
+            return self._form_check(line, key)
+        if not all(0 <= roll <= RULES.pins for roll in rolls):
+            return self._form_check(line, key)  # Out of range: rejected here, with the form's messages
+        return rolls
+
+    def _check_rules(self, batch):
+        turns = [turn[3:] for g in batch for turn in g.turns]
+        mask = RULES.valid_mask(turns)
+        if mask.all():
+            return
+        first = int(mask.argmin())
+        lines = [line for g in batch for line in g.lines]
+        self._form_check(lines[first], tuple(str(roll) for roll in turns[first]))
+
+    def _form_check(self, line, key):
+        """ScoreForm's verdict on raw rolls: the cleaned ints, or ImportRowError with its messages."""
+        if key not in self._turn_checks:
+            form = ScoreForm(data={"roll1": key[0], "roll2": key[1], "roll3": key[2]})
+            if form.is_valid():
+                data = form.cleaned_data
+                self._turn_checks[key] = (data["roll1"], data["roll2"], data["roll3"])
+            else:
+                errors = "; ".join(f"{field}: {' '.join(messages)}" for field, messages in form.errors.items())
+                self._turn_checks[key] = errors
+        result = self._turn_checks[key]
+        if isinstance(result, str):
+            raise ImportRowError(line, result)
+        return result
+
+    def _add_row(self, game, line, row):
+        try:
+            round_number, cycle = int(row["round"]), int(row["cycle"])
+        except (TypeError, ValueError) as exc:
+            raise ImportRowError(line, "round and cycle must be whole numbers") from exc
+        if round_number < 1 or cycle < 1:
+            raise ImportRowError(line, "round and cycle start at 1")
+        team, player = row["team"], row["player"]
+        if team not in TEAMS:
+            raise ImportRowError(line, f"team must be one of {', '.join(TEAMS)}, not {team!r}")
+        if not player:
+            raise ImportRowError(line, "player is blank")
+        if game.lineup.setdefault((round_number, player), team) != team:
+            raise ImportRowError(line, f"{player} bowls for both teams in round {round_number}")
+        game.turns.append((round_number, cycle, player, *self._parse_rolls(line, row)))
+        game.lines.append(line)
+
+    def _start_game(self, line, row):
+        ref = str(row["game"])
+        if ref in self._seen_refs:
+            raise ImportRowError(line, f"game {ref!r} appears again after other games; keep each game's rows together")
+        self._seen_refs.add(ref)
+        try:
+            date.fromisoformat(row["date"])
+        except (TypeError, ValueError) as exc:
+            raise ImportRowError(line, f"date must be YYYY-MM-DD, not {row['date']!r}") from exc
+        try:
+            return _PendingGame(ref, line, row)
+        except ValueError as exc:
+            raise ImportRowError(line, "cycles_per_round must be a whole number") from exc
+
+    # --- Writing ---
+
+    def _write_batch(self, batch):
+        """Insert a batch of validated games and their rows, and rebuild their derived tables."""
+        self.names[Opponent].resolve({g.opponent for g in batch})
+        self.names[Location].resolve({g.location for g in batch})
+        self.names[GameType].resolve({g.game_type for g in batch})
+        self.names[Player].resolve({player for g in batch for (_, player) in g.lineup})
+
+        games = Game.objects.bulk_create([
+            Game(
+                date=g.date,
+                opponent_id=self.names[Opponent].get(g.opponent),
+                location_id=self.names[Location].get(g.location),
+                game_type_id=self.names[GameType].get(g.game_type),
+                cycles_per_round=g.cycles_per_round or max(turn[1] for turn in g.turns),
+                team_first=g.team_first,
+            )
+            for g in batch
+        ])
+        player_ids = self.names[Player].ids
+        lineups, scores = [], []
+        for game, pending in zip(games, batch):
+            lineups += [
+                GamePlayer(game=game, player_id=player_ids[player], round_number=round_number, team=team)
+                for (round_number, player), team in pending.lineup.items()
+            ]
+            scores += [
+                Score(
+                    game=game, player_id=player_ids[player], round_number=round_number, cycle_number=cycle,
+                    roll1=roll1, roll2=roll2, roll3=roll3, total=roll1 + roll2 + roll3,
+                )
+                for round_number, cycle, player, roll1, roll2, roll3 in pending.turns
+            ]
+        GamePlayer.objects.bulk_create(lineups, batch_size=2000)
+        Score.objects.bulk_create(scores, batch_size=2000)
+
+        # bulk_create skips the model signals that maintain these
+        game_ids = [game.id for game in games]
+        rebuild_round_totals(game_ids)
+        rebuild_careers(game_ids)
+
+    def _flush(self, batch, rows_done):
+        if not batch:
+            return
+        self._check_rules(batch)
+        games, turns = self.games + len(batch), self.turns + sum(len(g.turns) for g in batch)
+        if not self.dry_run:
+            with transaction.atomic():
+                self._write_batch(batch)
+                self._save_checkpoint(rows_done, batch[-1].ref, games, turns)
+        self.games, self.turns = games, turns
+        elapsed = time.monotonic() - self._started
+        self.progress(
+            f"{self.rows} rows, {self.games} games, {self.turns} turns "
+            f"({self.rows / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+
+    # --- Checkpoints ---
+
+    def load_checkpoint(self, source):
+        """Rows already committed by an earlier run over the same file, or 0."""
+        if not self.checkpoint:
+            return 0
+        checkpoint = ImportCheckpoint.objects.filter(name=self.checkpoint).first()
+        if checkpoint is None:
+            return 0
+        if checkpoint.source != os.path.abspath(source):
+            raise ValueError(f"Checkpoint {self.checkpoint} belongs to {checkpoint.source}")
+        self._earlier_games, self._earlier_turns = checkpoint.games, checkpoint.turns
+        return checkpoint.rows
+
+    def _save_checkpoint(self, rows_done, last_game, games, turns):
+        """Record progress; called inside the batch's transaction so both commit or neither does."""
+        if not self.checkpoint or self.dry_run:
+            return
+        ImportCheckpoint.objects.update_or_create(name=self.checkpoint, defaults={
+            "source": self._source, "rows": rows_done, "last_game": last_game,
+            "games": self._earlier_games + games, "turns": self._earlier_turns + turns,
+        })
+
+    # --- Driver ---
+
+    def run(self, path, resume=False, restart=False):
+        """
+        Import the file; returns {"rows", "games", "turns", "skipped_rows"}. restart drops
+        an existing checkpoint first, so everything is imported again.
+        """
+        self._source = os.path.abspath(path)
+        self._started = time.monotonic()
+        if restart and self.checkpoint and not self.dry_run:
+            ImportCheckpoint.objects.filter(name=self.checkpoint).delete()
+        if (not resume and not self.dry_run and self.checkpoint
+                and ImportCheckpoint.objects.filter(name=self.checkpoint).exists()):
+            # Importing the same file twice would duplicate every game
+            raise ValueError(f"Checkpoint {self.checkpoint} exists: pass resume to continue it, or restart to start over")
+        skip = self.load_checkpoint(path) if resume else 0
+
+        batch, batch_turns = [], 0
+        game = None
+        for line, row in read_rows(path):
+            self.rows += 1
+            if self.rows <= skip:
+                self._seen_refs.add(str(row.get("game")))
+                continue
+            missing = [field for field in REQUIRED_FIELDS if row.get(field) in (None, "")]
+            if missing:
+                raise ImportRowError(line, f"missing {', '.join(missing)}")
+
+            if game is None or str(row["game"]) != game.ref:
+                if game is not None:
+                    batch.append(game)
+                    batch_turns += len(game.turns)
+                    if batch_turns >= self.batch_size:
+                        # Everything before this row belongs to complete games
+                        self._flush(batch, self.rows - 1)
+                        batch, batch_turns = [], 0
+                game = self._start_game(line, row)
+            self._add_row(game, line, row)
+
+        if game is not None:
+            batch.append(game)
+        self._flush(batch, self.rows)
+        if self.checkpoint and not self.dry_run:
+            ImportCheckpoint.objects.filter(name=self.checkpoint).update(done=True)
+        return {"rows": self.rows, "games": self.games, "turns": self.turns, "skipped_rows": skip}
@@ -0,0 +1,88 @@
+# scores/leaderboards.py
+"""
+Own-team leaderboards: top players by total score, average per cycle and
+zero-roll rate, for all time or scoped to a season (calendar year) and/or a
+game type.
+
+Boards are computed from PlayerGameLine (one row per player per game) and
+cached. The cache key includes a cheap token over the scope's games (count,
+highest id and the sum of their versions), and every Score/GamePlayer write
+bumps its game's version. A write therefore invalidates exactly the boards
+whose scope contains that game, in every worker.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+
+from .models import Game, PlayerGameLine
+
+CACHE_TIMEOUT = 60 * 60 * 24
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 50
+# Rate boards only rank players with enough cycles for the rate to mean something
+MIN_CYCLES_FOR_RATES = 9
+
+
+def _scope_games(season=None, game_type_id=None):
+    games = Game.objects.all()
+    if season is not None:
+        games = games.filter(date__year=season)
+    if game_type_id is not None:
+        games = games.filter(game_type_id=game_type_id)
+    return games
+
+
+def _scope_token(games):
+    token = games.aggregate(n=Count("id"), last=Max("id"), versions=Sum("version"))
+    return f"{token['n']}.{token['last'] or 0}.{token['versions'] or 0}"
+
+
+def compute_leaderboards(season=None, game_type_id=None, limit=DEFAULT_LIMIT):
+    games = _scope_games(season, game_type_id)
+    lines = PlayerGameLine.objects.filter(team="own")
+    if season is not None or game_type_id is not None:
+        lines = lines.filter(game__in=games)
+    rows = (
+        lines.values("player_id", "player__name")
+        .annotate(
+            total_score=Sum("total_score"), cycles=Sum("cycles"),
+            rolls=Sum("rolls"), zero_rolls=Sum("zero_rolls"), games=Count("game_id"),
+        )
+        .order_by()
+    )
+
+    players = []
+    for row in rows:
+        cycles, rolls = row["cycles"] or 0, row["rolls"] or 0
+        if not cycles:
+            continue  # In a lineup but never scored
+        players.append({
+            "player_id": row["player_id"],
+            "player__name": row["player__name"],
+            "games": row["games"],
+            "cycles": cycles,
+            "total_score": row["total_score"] or 0,
+            "avg_per_cycle": round((row["total_score"] or 0) / cycles, 2) if cycles else 0.0,
+            "zero_roll_rate": round((row["zero_rolls"] or 0) / rolls * 100, 1) if rolls else 0.0,
+        })
+    qualified = [p for p in players if p["cycles"] >= MIN_CYCLES_FOR_RATES]
+    return {
+        "by_total": sorted(players, key=lambda p: (-p["total_score"], p["player__name"]))[:limit],
+        "by_average": sorted(qualified, key=lambda p: (-p["avg_per_cycle"], p["player__name"]))[:limit],
+        "by_zero_roll_rate": sorted(qualified, key=lambda p: (p["zero_roll_rate"], p["player__name"]))[:limit],
+    }
+
+
+def get_leaderboards(season=None, game_type_id=None, limit=DEFAULT_LIMIT):
+    """Cached boards for the scope; costs one small aggregate over the scope's games on a hit."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    token = _scope_token(_scope_games(season, game_type_id))
+    key = f"leaderboards:{season or 'all'}:{game_type_id or 'all'}:{limit}:{token}"
+    boards = cache.get(key)
+    if boards is None:
+        boards = compute_leaderboards(season, game_type_id, limit)
+        cache.set(key, boards, CACHE_TIMEOUT)
+    return boards
+
+
+def available_seasons():
+    return [d.year for d in Game.objects.dates("date", "year", order="DESC")]
@@ -0,0 +1,147 @@
+# scores/management/commands/benchmark_channel_layer.py
+import asyncio
+import json
+import multiprocessing
+import queue
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from scores.channel_layer import DatabaseChannelLayer
+from scores.models import ChannelEvent
+
+GROUP = "benchmark_fanout"
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _worker(index, sockets, messages, timeout, config, ready, results):
+    """A worker process holding `sockets` group members; reports each delivery's latency."""
+    connections.close_all()  # Never share the parent's database connection
+
+    async def run():
+        layer = DatabaseChannelLayer(**config)
+        channels = [await layer.new_channel() for _ in range(sockets)]
+        for channel in channels:
+            await layer.group_add(GROUP, channel)
+        await asyncio.sleep(0.5)  # Let the poller take its starting point before anything is sent
+        ready.put(index)
+
+        latencies = []
+        received_at = []
+
+        async def drain(channel):
+            for _ in range(messages):
+                message = await layer.receive(channel)
+                now = time.time()
+                latencies.append(now - message["sent"])
+                received_at.append(now)
+
+        try:
+            await asyncio.wait_for(asyncio.gather(*(drain(channel) for channel in channels)), timeout)
+        except asyncio.TimeoutError:
+            pass
+        results.put((index, latencies, max(received_at, default=None)))
+
+    asyncio.run(run())
+
+
+async def _send(config, messages, rate):
+    layer = DatabaseChannelLayer(**config)
+    started = time.time()
+    for number in range(messages):
+        if rate:
+            await asyncio.sleep(max(0, started + number / rate - time.time()))
+        await layer.group_send(GROUP, {"type": "benchmark.message", "sent": time.time(), "number": number})
+    return started, time.time()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cross-process fan-out through DatabaseChannelLayer: start 1, 4 and 8 worker processes "
+        "(by default) that each hold group members, group_send from this process, and report delivery "
+        "latency and throughput. Uses the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+        parser.add_argument("--sockets", type=int, default=10, help="Group members per worker.")
+        parser.add_argument("--messages", type=int, default=300, help="group_send calls per run.")
+        parser.add_argument("--rate", type=float, default=100, help="Messages per second (0: as fast as possible).")
+        parser.add_argument("--poll-interval", type=float, default=0.05)
+        parser.add_argument("--max-poll-interval", type=float, default=0.5)
+        parser.add_argument("--output", help="Also write the results as JSON.")
+
+    def handle(self, *args, **options):
+        config = {"poll_interval": options["poll_interval"], "max_poll_interval": options["max_poll_interval"]}
+        messages, sockets, rate = options["messages"], options["sockets"], options["rate"]
+        timeout = (messages / rate if rate else 0) + 15
+        context = multiprocessing.get_context("fork")
+
+        results = {}
+        for workers in options["workers"]:
+            ready, reports = context.Queue(), context.Queue()
+            connections.close_all()
+            processes = [
+                context.Process(target=_worker, args=(index, sockets, messages, timeout, config, ready, reports))
+                for index in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            try:
+                for _ in processes:
+                    ready.get(timeout=30)
+                started, finished = asyncio.run(_send(config, messages, rate))
+                collected = [reports.get(timeout=timeout + 30) for _ in processes]
+            except queue.Empty:
+                raise CommandError(f"Worker processes did not report back ({workers} workers)")
+            finally:
+                for process in processes:
+                    process.join(timeout=5)
+                    if process.is_alive():
+                        process.terminate()
+
+            latencies = [latency for _, worker_latencies, _ in collected for latency in worker_latencies]
+            last = max((at for _, _, at in collected if at), default=finished)
+            expected = workers * sockets * messages
+            results[workers] = {
+                "delivered": len(latencies),
+                "expected": expected,
+                "send_per_s": round(messages / (finished - started), 1),
+                "delivered_per_s": round(len(latencies) / (last - started), 1) if last > started else 0,
+                "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+                "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+                "max_ms": round(max(latencies) * 1000, 1) if latencies else None,
+            }
+        ChannelEvent.objects.filter(group_name=GROUP).delete()
+
+        failures = []
+        for workers, result in results.items():
+            short = result["delivered"] < result["expected"]
+            if short:
+                failures.append(workers)
+            style = self.style.ERROR if short else self.style.SUCCESS
+            self.stdout.write(style(
+                f"{workers:>2} worker(s)  {result['delivered']:>7}/{result['expected']:<7} delivered  "
+                f"{result['send_per_s']:>8.1f} sends/s  {result['delivered_per_s']:>9.1f} deliveries/s  "
+                f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  max {result['max_ms']} ms"
+            ))
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps({
+                "database": connections["default"].vendor,
+                "sockets_per_worker": sockets,
+                "messages": messages,
+                "rate": rate,
+                **config,
+                "runs": results,
+            }, indent=2))
+            self.stdout.write(f"Wrote {options['output']}")
+        if failures:
+            raise CommandError(f"Messages were lost with {', '.join(map(str, failures))} worker(s)")
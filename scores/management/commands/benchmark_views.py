@@ -0,0 +1,192 @@
+# scores/management/commands/benchmark_views.py
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from scores.history import encode_cursor
+from scores.models import Game, GamePlayer, GameProgress, Player, PlayerGameLine
+from scores.synthetic import generate_league, random_turn
+
+AJAX = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+# Most queries a single request to each view may run. These do not depend on the size of
+# the dataset, so a view that goes over has started querying per row again.
+QUERY_BUDGETS = {
+    "past_games": 6,
+    "past_games (ajax, filtered)": 6,
+    "past_games_feed (deep)": 2,
+    "game_statistics": 4,  # Cached per Game.version after the warm-up request
+    "player_statistics": 7,
+    "opponent_statistics": 6,
+    "player_game_history_page": 6,
+    "player_game_history (keyset)": 3,
+    "live_game (ajax score)": 17,  # Includes the player line / career refresh
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _live_game(data, lineup_size=6):
+    """A fresh game with a round 1 lineup and nobody scored yet, for the live_game POST."""
+    source = Game.objects.get(pk=data["game_ids"][0])
+    game = Game.objects.create(
+        date=source.date, opponent_id=source.opponent_id, location_id=source.location_id,
+        game_type_id=source.game_type_id, cycles_per_round=1000,
+    )
+    players = Player.objects.filter(pk__in=data["player_ids"][:lineup_size])
+    opp_players = Player.objects.filter(name__in=[f"Opp. {p.name}" for p in players])
+    GamePlayer.objects.bulk_create(
+        [GamePlayer(game=game, player=p, round_number=1, team="own") for p in players]
+        + [GamePlayer(game=game, player=p, round_number=1, team="opp") for p in opp_players]
+    )
+    GameProgress.objects.create(game=game)
+    return game
+
+
+def view_cases(data, rng):
+    """(label, callable(client) -> response) for every benchmarked request."""
+    game_id = data["game_ids"][len(data["game_ids"]) // 2]
+    player_id = data["player_ids"][0]
+    opponent_id = data["opponent_ids"][0]
+    game_type_id = data["game_type_ids"][0]
+    live_game = _live_game(data)
+    # Cursor a few games from the start of the player's history: the deepest page there is
+    oldest = (
+        PlayerGameLine.objects.filter(player_id=player_id, cycles__gt=0)
+        .order_by("game_date", "game_id").values_list("game_date", "game_id")[5:6]
+    )
+    deep_cursor = encode_cursor(*oldest[0]) if oldest else ""
+    deep_game = Game.objects.order_by("date", "id").values_list("date", "id")[25]
+    deep_feed_cursor = encode_cursor(*deep_game)
+
+    def score_turn(client):
+        roll1, roll2, roll3 = random_turn(rng)
+        return client.post(
+            reverse("live_game", args=[live_game.id]),
+            {"roll1": roll1, "roll2": roll2, "roll3": roll3}, **AJAX,
+        )
+
+    return [
+        ("past_games", lambda client: client.get(reverse("past_games"))),
+        ("past_games (ajax, filtered)", lambda client: client.get(
+            reverse("past_games"), {"opponent": opponent_id, "result": "Win", "page": 2}, **AJAX)),
+        ("past_games_feed (deep)", lambda client: client.get(
+            reverse("past_games_feed"), {"cursor": deep_feed_cursor, "limit": 20})),
+        ("game_statistics", lambda client: client.get(reverse("game_statistics", args=[game_id]))),
+        ("player_statistics", lambda client: client.get(reverse("player_statistics"), {"player_id": player_id})),
+        ("opponent_statistics", lambda client: client.get(
+            reverse("opponent_statistics"), {"opponent_id": opponent_id, "game_type_id": game_type_id})),
+        ("player_game_history_page", lambda client: client.get(
+            reverse("ajax_player_game_history", args=[player_id, 2]), **AJAX)),
+        ("player_game_history (keyset)", lambda client: client.get(
+            reverse("ajax_player_game_history_cursor", args=[player_id]), {"cursor": deep_cursor}, **AJAX)),
+        ("live_game (ajax score)", score_turn),
+    ]
+
+
+def _checked(response):
+    if response.status_code >= 400:
+        raise CommandError(f"{response.request['PATH_INFO']} returned {response.status_code}.")
+    return response
+
+
+def measure(request, client, repeat):
+    """
+    Query count and wall time over repeat requests, then peak memory from one more.
+    tracemalloc slows everything down, so it stays off for the timed runs.
+    """
+    query_counts = []
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            _checked(request(client))
+            timings.append(time.perf_counter() - started)
+        query_counts.append(len(queries))
+
+    tracemalloc.start()
+    try:
+        _checked(request(client))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "queries": max(query_counts),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "max_ms": round(max(timings) * 1000, 2),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the main views through the test client against a synthetic league and record query counts, "
+        "wall time and peak memory. Writes a JSON baseline and fails if any view goes over its query budget. "
+        "All data, including scores posted by the live_game benchmark, is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seasons", type=int, default=3)
+        parser.add_argument("--games-per-season", type=int, default=60)
+        parser.add_argument("--repeat", type=int, default=5, help="Requests per view (after one warm-up request).")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="bench_baseline.json", help="Where to write the JSON results.")
+
+    def handle(self, *args, **options):
+        results = {}
+        try:
+            # The test client talks to the views in-process, so the whole run shares this transaction
+            with transaction.atomic(), override_settings(ALLOWED_HOSTS=["testserver"]):
+                data = generate_league(
+                    seasons=options["seasons"], games_per_season=options["games_per_season"], seed=options["seed"],
+                )
+                self.stdout.write(f"Synthetic dataset: {data['games']} games, {data['scores']} scores.")
+
+                staff = get_user_model().objects.create_user(username="benchmark-staff", is_staff=True)
+                client = Client()
+                client.force_login(staff)
+
+                for label, request in view_cases(data, random.Random(options["seed"])):
+                    request(client)  # warm-up: template loading, cached state
+                    results[label] = measure(request, client, options["repeat"])
+                    results[label]["budget"] = QUERY_BUDGETS[label]
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        failures = []
+        for label, result in results.items():
+            over = result["queries"] > result["budget"]
+            if over:
+                failures.append(label)
+            style = self.style.ERROR if over else self.style.SUCCESS
+            self.stdout.write(style(
+                f"{label:<30} {result['queries']:>3}/{result['budget']:<3} queries  "
+                f"{result['median_ms']:>8.2f} ms median  {result['max_ms']:>8.2f} ms max  {result['peak_kib']:>9.1f} KiB peak"
+            ))
+
+        output = Path(options["output"])
+        output.write_text(json.dumps({
+            "database": connection.vendor,
+            "seasons": options["seasons"],
+            "games": data["games"],
+            "scores": data["scores"],
+            "repeat": options["repeat"],
+            "views": results,
+        }, indent=2))
+        self.stdout.write(f"Wrote {output}")
+
+        if failures:
+            raise CommandError(f"Over query budget: {', '.join(failures)}")
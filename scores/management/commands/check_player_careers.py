@@ -0,0 +1,37 @@
+# scores/management/commands/check_player_careers.py
+from django.core.management.base import BaseCommand, CommandError
+
+from scores.careers import career_mismatches, rebuild_careers
+from scores.models import Player
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare every stored PlayerCareer with figures computed directly from Score and GamePlayer. "
+        "Exits with an error if any differ."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--player", type=int, action="append", dest="player_ids",
+            help="Only check this player (may be given more than once).",
+        )
+        parser.add_argument("--fix", action="store_true", help="Rebuild all careers if a mismatch is found.")
+
+    def handle(self, *args, **options):
+        mismatches = career_mismatches(options["player_ids"])
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("All player careers match the score history."))
+            return
+
+        names = dict(Player.objects.filter(pk__in={m[0] for m in mismatches}).values_list("id", "name"))
+        for player_id, field, stored, expected in mismatches:
+            self.stdout.write(self.style.ERROR(
+                f"{names.get(player_id, player_id)}: {field} is {stored}, expected {expected}"
+            ))
+        players = len({m[0] for m in mismatches})
+        if options["fix"]:
+            rebuild_careers()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt careers after {len(mismatches)} mismatch(es)."))
+            return
+        raise CommandError(f"{len(mismatches)} mismatch(es) across {players} player(s); run with --fix to rebuild.")
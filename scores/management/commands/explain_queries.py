@@ -0,0 +1,113 @@
+# scores/management/commands/explain_queries.py
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Sum
+
+from scores.models import Game, GamePlayer, Score, TeamRoundTotal
+from scores.synthetic import generate_league
+from scores.totals import annotate_game_results
+
+# Tables that grow with every game played; a sequential scan on any of them is a failure
+WATCHED_TABLES = {model._meta.db_table for model in (Game, GamePlayer, Score, TeamRoundTotal)}
+
+
+def view_queries(data):
+    """(label, queryset) pairs for the main queries behind each view."""
+    game_id = data["game_ids"][len(data["game_ids"]) // 2]
+    game_ids = data["game_ids"][:5]
+    player_id = data["player_ids"][0]
+    opponent_id = data["opponent_ids"][0]
+    game_type_id = data["game_type_ids"][0]
+    return [
+        ("past_games: page", annotate_game_results(Game.objects.all()).order_by("-date", "-id")[:5]),
+        ("past_games: opponent filter",
+         annotate_game_results(Game.objects.filter(opponent_id=opponent_id)).order_by("-date", "-id")[:5]),
+        ("live_game: round lineup", GamePlayer.objects.filter(game_id=game_id, round_number=1).order_by("id")),
+        ("live_game: round scores",
+         Score.objects.filter(game_id=game_id, round_number=1).order_by("cycle_number", "id")),
+        ("live_game: round totals", TeamRoundTotal.objects.filter(game_id=game_id, round_number=1)),
+        ("game_statistics: player totals",
+         Score.objects.filter(game_id=game_id).values("player_id").annotate(t=Sum("total")).order_by()),
+        ("game_statistics: round totals", TeamRoundTotal.objects.filter(game_id=game_id)),
+        ("player_statistics: history by game",
+         Score.objects.filter(player_id=player_id).values("game_id").annotate(a=Avg("total")).order_by()),
+        ("player_statistics: games played",
+         GamePlayer.objects.filter(player_id=player_id).values("game_id").distinct()),
+        ("opponent_statistics: games",
+         Game.objects.filter(opponent_id=opponent_id, game_type_id=game_type_id).order_by("date")),
+        ("opponent_statistics: team totals",
+         TeamRoundTotal.objects.filter(game_id__in=game_ids).values("game_id", "team")
+         .annotate(t=Sum("total")).order_by()),
+        ("opponent_statistics: own players",
+         Score.objects.filter(game_id__in=game_ids).values("player_id").annotate(n=Count("id")).order_by()),
+    ]
+
+
+def sequential_scans(plan, vendor):
+    """Tables the plan reads without an index."""
+    if vendor == "postgresql":
+        return set(re.findall(r"Seq Scan on (\w+)", plan))
+    if vendor == "sqlite":
+        # A SCAN through an index still reads every row when the result then needs sorting
+        sorts_everything = "USE TEMP B-TREE FOR ORDER BY" in plan
+        tables = set()
+        for line in plan.splitlines():
+            match = re.search(r"\bSCAN (\w+)(.*)", line)
+            if match and ("USING" not in match.group(2) or sorts_everything):
+                tables.add(match.group(1))
+        return tables
+    return set()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on each view's main queries against a synthetic dataset and fail if any of them "
+        "falls back to a sequential scan of a large table. The dataset is rolled back afterwards. "
+        "A synthetic league is far smaller than production, so on PostgreSQL the check runs with "
+        "enable_seqscan off: a Seq Scan that remains means no index can serve the query at all. "
+        "Validated against SQLite; the PostgreSQL plan reading has not been run against a live server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seasons", type=int, default=3)
+        parser.add_argument("--games-per-season", type=int, default=60)
+        parser.add_argument("--show-plans", action="store_true", help="Print every plan, not just failures.")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ("postgresql", "sqlite"):
+            raise CommandError(f"Don't know how to read {vendor} query plans.")
+
+        failures = []
+        try:
+            with transaction.atomic():
+                data = generate_league(seasons=options["seasons"], games_per_season=options["games_per_season"])
+                self.stdout.write(f"Synthetic dataset: {data['games']} games, {data['scores']} scores.")
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                    if vendor == "postgresql":
+                        # Tiny tables are cheapest to scan whole; make the planner say whether an index would do
+                        cursor.execute("SET LOCAL enable_seqscan = off")
+
+                for label, queryset in view_queries(data):
+                    plan = queryset.explain()
+                    scanned = sequential_scans(plan, vendor) & WATCHED_TABLES
+                    if scanned:
+                        failures.append(label)
+                        self.stdout.write(self.style.ERROR(f"SEQ SCAN  {label}: {', '.join(sorted(scanned))}"))
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f"ok        {label}"))
+                    if scanned or options["show_plans"]:
+                        self.stdout.write("    " + plan.replace("\n", "\n    "))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f"{len(failures)} quer{'y' if len(failures) == 1 else 'ies'} fell back to a sequential scan.")
@@ -0,0 +1,39 @@
+# scores/management/commands/export_scores.py
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from scores.export import DEFAULT_CHUNK_SIZE, FORMATS, export_rows, filtered_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every turn with its game, opponent, location and team as CSV or NDJSON, read in keyset "
+        "chunks so memory stays flat. The output can be loaded with import_results."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", help="File to write (default: stdout).")
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--date-from", type=date.fromisoformat, help="First game date, YYYY-MM-DD.")
+        parser.add_argument("--date-to", type=date.fromisoformat, help="Last game date, YYYY-MM-DD.")
+        parser.add_argument("--opponent", type=int, help="Opponent id.")
+        parser.add_argument("--player", type=int, help="Player id.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per query.")
+
+    def handle(self, *args, **options):
+        scores = filtered_scores(
+            date_from=options["date_from"], date_to=options["date_to"],
+            opponent_id=options["opponent"], player_id=options["player"],
+        )
+        write_lines, _ = FORMATS[options["format"]]
+        output = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else sys.stdout
+        try:
+            for text in write_lines(export_rows(scores, options["chunk_size"])):
+                output.write(text)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        if options["output"]:
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}."))
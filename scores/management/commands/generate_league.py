@@ -0,0 +1,40 @@
+# scores/management/commands/generate_league.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from scores.synthetic import NAME_PREFIX, generate_league
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic seasons of completed games (lineups, scores and round totals) "
+        f"for load testing. Opponents, locations, game types and players are named '{NAME_PREFIX} ...'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seasons", type=int, default=3)
+        parser.add_argument("--games-per-season", type=int, default=60)
+        parser.add_argument("--opponents", type=int, default=12)
+        parser.add_argument("--locations", type=int, default=6)
+        parser.add_argument("--players", type=int, default=16, help="Size of the own-team squad.")
+        parser.add_argument("--lineup-size", type=int, default=6, help="Players per team per round.")
+        parser.add_argument("--rounds", type=int, default=3)
+        parser.add_argument("--cycles", type=int, default=3, help="Cycles per round.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, so runs are reproducible.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            data = generate_league(
+                seasons=options["seasons"],
+                games_per_season=options["games_per_season"],
+                opponents=options["opponents"],
+                locations=options["locations"],
+                players=options["players"],
+                lineup_size=options["lineup_size"],
+                rounds=options["rounds"],
+                cycles=options["cycles"],
+                seed=options["seed"],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {data['games']} game(s), {data['game_players']} lineup row(s) and {data['scores']} score(s)."
+        ))
@@ -0,0 +1,58 @@
+# scores/management/commands/import_results.py
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scores.importer import DEFAULT_BATCH_SIZE, ImportRowError, ResultsImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream historical results from a CSV or NDJSON file (one row per turn, each game's rows together; "
+        "see scores/importer.py for the columns). Turns are checked against the Somerset rules, inserted in "
+        "batched transactions, and a checkpoint is kept so an interrupted import can be resumed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="A .csv, .ndjson or .jsonl file.")
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+            help="Turns per transaction (games are never split across batches).",
+        )
+        parser.add_argument(
+            "--checkpoint", help="Checkpoint name, kept in the database (default: the file's absolute path).",
+        )
+        parser.add_argument(
+            "--resume", action="store_true",
+            help="Skip the rows an earlier run over the same file already committed. "
+                 "Without it, an existing checkpoint stops the import rather than duplicating games.",
+        )
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Drop an existing checkpoint and import the whole file again (duplicates games already imported).",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Validate the whole file without writing.")
+
+    def handle(self, *args, **options):
+        importer = ResultsImporter(
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+            checkpoint=options["checkpoint"] or os.path.abspath(options["path"]),
+            progress=self.stdout.write if options["verbosity"] >= 1 else None,
+        )
+        try:
+            result = importer.run(options["path"], resume=options["resume"], restart=options["restart"])
+        except ImportRowError as exc:
+            if options["dry_run"]:
+                raise CommandError(str(exc)) from exc
+            raise CommandError(
+                f"{exc} ({importer.games} game(s) committed before it; fix the row and rerun with --resume)"
+            ) from exc
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        verb = "Validated" if options["dry_run"] else "Imported"
+        skipped = f", skipped {result['skipped_rows']} row(s) already imported" if result["skipped_rows"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['games']} game(s) and {result['turns']} turn(s) from {result['rows']} row(s){skipped}."
+        ))
@@ -0,0 +1,21 @@
+# scores/management/commands/rebuild_player_careers.py
+from django.core.management.base import BaseCommand
+
+from scores.careers import rebuild_careers
+
+
+class Command(BaseCommand):
+    help = "Recompute PlayerGameLine rows from Score and GamePlayer, then every PlayerCareer from its lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--game", type=int, action="append", dest="game_ids",
+            help="Only recompute lines for this game (may be given more than once); "
+                 "careers of its players are still rebuilt in full.",
+        )
+
+    def handle(self, *args, **options):
+        game_ids = options["game_ids"]
+        written = rebuild_careers(game_ids)
+        scope = f"{len(game_ids)} game(s)" if game_ids else "all games"
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt player lines for {scope}: {written} career(s) written."))
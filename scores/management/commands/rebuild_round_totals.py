@@ -0,0 +1,22 @@
+# scores/management/commands/rebuild_round_totals.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from scores.totals import rebuild_round_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-(game, round, team) TeamRoundTotal table from Score and GamePlayer."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--game", type=int, action="append", dest="game_ids",
+            help="Only rebuild this game (may be given more than once).",
+        )
+
+    def handle(self, *args, **options):
+        game_ids = options["game_ids"]
+        with transaction.atomic():
+            written = rebuild_round_totals(game_ids)
+        scope = f"{len(game_ids)} game(s)" if game_ids else "all games"
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt round totals for {scope}: {written} row(s) written."))
@@ -0,0 +1,185 @@
+# scores/middleware.py
+"""
+Opt-in per-request SQL and timing instrumentation (enable with QUERY_TIMING=True).
+
+Every statement run while a request is in flight is timed by a database
+execute wrapper. The request's query count, DB time, slowest statements and
+repeated statement shapes (the usual sign of an N+1) go out as Server-Timing
+headers and into a ring buffer that staff can read from the query_timings view.
+
+The current request's recorder is kept in a ContextVar rather than on the
+connection: under ASGI the sync views run in a worker thread via sync_to_async,
+which copies the context, so the wrapper finds the right recorder either way.
+"""
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+SLOWEST_STATEMENTS = 5
+REPEATED_THRESHOLD = 3  # Same statement shape this many times in one request
+
+_current_recorder = ContextVar("query_timing_recorder", default=None)
+_recent = deque(maxlen=getattr(settings, "QUERY_TIMING_BUFFER_SIZE", 200))
+_recent_lock = threading.Lock()
+
+
+def fingerprint(sql):
+    """Statement shape with literals and IN-lists collapsed, so repeats group together."""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+\b", "?", sql)
+    sql = re.sub(r"\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)", "IN (...)", sql)
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.statements = []  # (sql, seconds)
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self.lock:
+                self.statements.append((sql, time.perf_counter() - started))
+
+    def summary(self):
+        with self.lock:
+            statements = list(self.statements)
+        shapes = Counter()
+        shape_time = defaultdict(float)
+        for sql, seconds in statements:
+            shape = fingerprint(sql)
+            shapes[shape] += 1
+            shape_time[shape] += seconds
+        slowest = sorted(statements, key=lambda s: s[1], reverse=True)[:SLOWEST_STATEMENTS]
+        return {
+            "queries": len(statements),
+            "db_ms": round(sum(seconds for _, seconds in statements) * 1000, 2),
+            "slowest": [{"sql": sql[:500], "ms": round(seconds * 1000, 2)} for sql, seconds in slowest],
+            "repeated": [
+                {"fingerprint": shape[:500], "count": count, "ms": round(shape_time[shape] * 1000, 2)}
+                for shape, count in shapes.most_common() if count >= REPEATED_THRESHOLD
+            ],
+        }
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def recent_requests():
+    """Newest first."""
+    with _recent_lock:
+        return list(reversed(_recent))
+
+
+class QueryTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Each thread/task gets its own connection objects; hook them as they connect
+        connection_created.connect(_install_wrapper, dispatch_uid="scores.query_timing")
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self._skip(request):
+            return self.get_response(request)
+        recorder, token, started = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self._finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        if self._skip(request):
+            return await self.get_response(request)
+        recorder, token, started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self._finish(request, response, recorder, started)
+
+    def _skip(self, request):
+        return bool(settings.STATIC_URL) and request.path.startswith(settings.STATIC_URL)
+
+    def _start(self):
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(connection)
+        recorder = QueryRecorder()
+        return recorder, _current_recorder.set(recorder), time.perf_counter()
+
+    def _finish(self, request, response, recorder, started):
+        entry = recorder.summary()
+        entry.update({
+            "method": request.method,
+            "path": request.get_full_path()[:300],
+            "status": response.status_code,
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+            "at": time.time(),
+        })
+        with _recent_lock:
+            _recent.append(entry)
+
+        timings = [
+            f'total;dur={entry["total_ms"]}',
+            f'db;dur={entry["db_ms"]};desc="{entry["queries"]} queries"',
+        ]
+        if entry["repeated"]:
+            worst = entry["repeated"][0]
+            timings.append(f'repeated;dur={worst["ms"]};desc="{len(entry["repeated"])} shapes, worst x{worst["count"]}"')
+        response.headers["Server-Timing"] = ", ".join(timings)
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # Without autorefresh (i.e. outside DEBUG) the lookup is an in-memory dict; only serving touches files
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
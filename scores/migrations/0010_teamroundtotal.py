@@ -0,0 +1,59 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+
+
+def backfill_round_totals(apps, schema_editor):
+    Score = apps.get_model('scores', 'Score')
+    GamePlayer = apps.get_model('scores', 'GamePlayer')
+    TeamRoundTotal = apps.get_model('scores', 'TeamRoundTotal')
+    team = Subquery(
+        GamePlayer.objects.filter(
+            game_id=OuterRef('game_id'),
+            round_number=OuterRef('round_number'),
+            player_id=OuterRef('player_id'),
+        ).values('team')[:1]
+    )
+    rows = (
+        Score.objects.annotate(team=team)
+        .values('game_id', 'round_number', 'team')
+        .annotate(team_total=Sum('total'), team_turns=Count('id'))
+        .order_by()
+    )
+    TeamRoundTotal.objects.bulk_create(
+        [
+            TeamRoundTotal(
+                game_id=row['game_id'], round_number=row['round_number'], team=row['team'],
+                total=row['team_total'] or 0, turns=row['team_turns'],
+            )
+            for row in rows if row['team'] in ('own', 'opp')
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0009_rename_opponent_column'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamRoundTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round_number', models.PositiveIntegerField()),
+                ('team', models.CharField(choices=[('own', 'Own Team'), ('opp', 'Opposing Team')], max_length=4)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('turns', models.PositiveIntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='round_totals', to='scores.game')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('game', 'round_number', 'team'), name='unique_team_round_total')],
+            },
+        ),
+        migrations.RunPython(backfill_round_totals, migrations.RunPython.noop),
+    ]
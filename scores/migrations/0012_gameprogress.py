@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0011_game_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameProgress',
+            fields=[
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress', serialize=False, to='scores.game')),
+                ('current_round', models.PositiveIntegerField(default=1)),
+                ('team_first', models.CharField(choices=[('own', 'Own Team'), ('opp', 'Opposing Team')], default='own', help_text='Which team goes first in the current round', max_length=4)),
+                ('turn_cursor', models.PositiveIntegerField(default=0, help_text='Turns recorded so far in the current round')),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0012_gameprogress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['-date', '-id'], name='game_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['opponent', 'game_type', 'date'], name='game_opp_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gameplayer',
+            index=models.Index(fields=['game', 'round_number', 'team'], name='gameplayer_game_round_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['game', 'round_number', 'cycle_number', 'id'], name='score_game_round_cycle_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['player', 'game', 'total'], name='score_player_game_idx'),
+        ),
+    ]
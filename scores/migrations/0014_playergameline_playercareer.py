@@ -0,0 +1,127 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:29
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+COUNTERS = ('total_score', 'cycles', 'rolls', 'zero_cycles', 'zero_rolls')
+
+
+def _max(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def backfill_careers(apps, schema_editor):
+    Score = apps.get_model('scores', 'Score')
+    GamePlayer = apps.get_model('scores', 'GamePlayer')
+    PlayerGameLine = apps.get_model('scores', 'PlayerGameLine')
+    PlayerCareer = apps.get_model('scores', 'PlayerCareer')
+
+    def empty_line():
+        return {
+            'team': '', 'total_score': 0, 'cycles': 0, 'rolls': 0, 'zero_cycles': 0, 'zero_rolls': 0,
+            'highest_cycle_score': None, 'highest_roll_score': None, 'result': '',
+        }
+
+    lines = {}
+    team_by_round = {}
+    for game_id, player_id, round_number, team in GamePlayer.objects.values_list(
+        'game_id', 'player_id', 'round_number', 'team'
+    ).iterator():
+        team_by_round[(game_id, player_id, round_number)] = team
+        line = lines.setdefault((game_id, player_id), empty_line())
+        if line['team'] != 'own':
+            line['team'] = team
+
+    team_totals = defaultdict(lambda: {'own': 0, 'opp': 0})
+    rows = Score.objects.values('game_id', 'player_id', 'round_number').annotate(
+        score_sum=Sum('total'), turns=Count('id'),
+        roll_count=Count('roll1') + Count('roll2') + Count('roll3'),
+        zero_turns=Count('id', filter=Q(total=0)),
+        zero_roll_count=Count('id', filter=Q(roll1=0)) + Count('id', filter=Q(roll2=0)) + Count('id', filter=Q(roll3=0)),
+        max_total=Max('total'), max_roll1=Max('roll1'), max_roll2=Max('roll2'), max_roll3=Max('roll3'),
+    ).order_by()
+    for row in rows.iterator():
+        line = lines.setdefault((row['game_id'], row['player_id']), empty_line())
+        line['total_score'] += row['score_sum'] or 0
+        line['cycles'] += row['turns']
+        line['rolls'] += row['roll_count']
+        line['zero_cycles'] += row['zero_turns']
+        line['zero_rolls'] += row['zero_roll_count']
+        line['highest_cycle_score'] = _max(line['highest_cycle_score'], row['max_total'])
+        line['highest_roll_score'] = _max(line['highest_roll_score'], row['max_roll1'], row['max_roll2'], row['max_roll3'])
+        team = team_by_round.get((row['game_id'], row['player_id'], row['round_number']))
+        if team in ('own', 'opp'):
+            team_totals[row['game_id']][team] += row['score_sum'] or 0
+
+    careers = {}
+    for (game_id, player_id), line in lines.items():
+        if line['team'] == 'own':
+            own, opp = team_totals[game_id]['own'], team_totals[game_id]['opp']
+            line['result'] = 'W' if own > opp else 'L' if own < opp else 'D'
+        career = careers.setdefault(player_id, PlayerCareer(player_id=player_id))
+        career.games_participated += 1 if line['team'] else 0
+        for field in COUNTERS:
+            setattr(career, field, getattr(career, field) + line[field])
+        for field in ('highest_cycle_score', 'highest_roll_score'):
+            setattr(career, field, _max(getattr(career, field), line[field]))
+        if line['result']:
+            field = {'W': 'wins', 'L': 'losses', 'D': 'draws'}[line['result']]
+            setattr(career, field, getattr(career, field) + 1)
+
+    PlayerGameLine.objects.bulk_create(
+        [PlayerGameLine(game_id=game_id, player_id=player_id, **line) for (game_id, player_id), line in lines.items()],
+        batch_size=1000,
+    )
+    PlayerCareer.objects.bulk_create(careers.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0013_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerCareer',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='career', serialize=False, to='scores.player')),
+                ('games_participated', models.PositiveIntegerField(default=0)),
+                ('total_score', models.PositiveIntegerField(default=0)),
+                ('cycles', models.PositiveIntegerField(default=0)),
+                ('rolls', models.PositiveIntegerField(default=0)),
+                ('zero_cycles', models.PositiveIntegerField(default=0)),
+                ('zero_rolls', models.PositiveIntegerField(default=0)),
+                ('highest_cycle_score', models.PositiveIntegerField(blank=True, null=True)),
+                ('highest_roll_score', models.PositiveIntegerField(blank=True, null=True)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlayerGameLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team', models.CharField(blank=True, choices=[('own', 'Own Team'), ('opp', 'Opposing Team')], max_length=4)),
+                ('total_score', models.PositiveIntegerField(default=0)),
+                ('cycles', models.PositiveIntegerField(default=0)),
+                ('rolls', models.PositiveIntegerField(default=0)),
+                ('zero_cycles', models.PositiveIntegerField(default=0)),
+                ('zero_rolls', models.PositiveIntegerField(default=0)),
+                ('highest_cycle_score', models.PositiveIntegerField(blank=True, null=True)),
+                ('highest_roll_score', models.PositiveIntegerField(blank=True, null=True)),
+                ('result', models.CharField(blank=True, choices=[('W', 'Win'), ('L', 'Loss'), ('D', 'Draw')], max_length=1)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_lines', to='scores.game')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_lines', to='scores.player')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('player', 'game'), name='unique_player_game_line')],
+            },
+        ),
+        migrations.RunPython(backfill_careers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:35
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_game_dates(apps, schema_editor):
+    Game = apps.get_model('scores', 'Game')
+    PlayerGameLine = apps.get_model('scores', 'PlayerGameLine')
+    PlayerGameLine.objects.update(
+        game_date=Subquery(Game.objects.filter(pk=OuterRef('game_id')).values('date')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0014_playergameline_playercareer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playergameline',
+            name='game_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_game_dates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='playergameline',
+            index=models.Index(fields=['player', '-game_date', '-game'], name='line_player_history_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0015_playergameline_game_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameplayer',
+            index=models.Index(fields=['game', 'round_number', 'player', 'team'], name='gameplayer_lineup_team_idx'),
+        ),
+    ]
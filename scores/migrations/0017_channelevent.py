@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0016_gameplayer_lineup_team_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group_name', models.CharField(max_length=100)),
+                ('message', models.JSONField()),
+                ('origin', models.CharField(help_text='Channel layer instance that sent it', max_length=32)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
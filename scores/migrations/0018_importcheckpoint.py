@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0017_channelevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('source', models.CharField(help_text='Absolute path of the file being imported', max_length=1024)),
+                ('rows', models.PositiveIntegerField(default=0, help_text='Rows committed so far')),
+                ('last_game', models.CharField(blank=True, max_length=255)),
+                ('games', models.PositiveIntegerField(default=0)),
+                ('turns', models.PositiveIntegerField(default=0)),
+                ('done', models.BooleanField(default=False)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0018_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['game', 'id'], name='score_game_id_idx'),
+        ),
+    ]
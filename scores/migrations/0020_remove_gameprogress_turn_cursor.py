@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:19
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0019_score_game_id_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='gameprogress',
+            name='turn_cursor',
+        ),
+    ]
@@ -43,10 +43,21 @@ class Game(models.Model):
     cycles_per_round = models.PositiveIntegerField(default=3)
     # team_first is already mapped to db column "first_team"
     team_first = models.BooleanField(default=True, help_text="Does your team start first?", db_column="first_team")
+    # Bumped on every Score/GamePlayer change, every edit of the game and every rename of an
+    # opponent, location, game type or player it shows; lets caches and API ETags detect stale entries
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"{self.date} vs {self.opponent}"
 
+    class Meta:
+        indexes = [
+            # past_games listing / keyset pagination
+            models.Index(fields=["-date", "-id"], name="game_date_id_idx"),
+            # opponent_statistics: games vs an opponent (optionally of one type) by date
+            models.Index(fields=["opponent", "game_type", "date"], name="game_opp_type_date_idx"),
+        ]
+
 class Player(models.Model):
     name = models.CharField(max_length=50, unique=True)
 
@@ -62,6 +73,14 @@ class GamePlayer(models.Model):
     def __str__(self):
         return f"{self.player.name} ({self.get_team_display()}) - Round {self.round_number}"
 
+    class Meta:
+        indexes = [
+            # Round lineups and team membership lookups
+            models.Index(fields=["game", "round_number", "team"], name="gameplayer_game_round_idx"),
+            # lineup_team(): a score's team by (game, round, player), answered from the index alone
+            models.Index(fields=["game", "round_number", "player", "team"], name="gameplayer_lineup_team_idx"),
+        ]
+
 class Score(models.Model):
     game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="scores")
     player = models.ForeignKey(Player, on_delete=models.CASCADE)
@@ -76,3 +95,137 @@ class Score(models.Model):
 
     def __str__(self):
         return f"{self.player.name} - R{self.round_number}C{self.cycle_number}"
+
+    class Meta:
+        indexes = [
+            # Live scoreboard: a round's scores in scoring order
+            models.Index(fields=["game", "round_number", "cycle_number", "id"], name="score_game_round_cycle_idx"),
+            # Player history grouped by game; total makes it covering for the per-game sums
+            models.Index(fields=["player", "game", "total"], name="score_player_game_idx"),
+            # Keyset chunks of the export (scores/export.py), in (game, id) order
+            models.Index(fields=["game", "id"], name="score_game_id_idx"),
+        ]
+
+
+class TeamRoundTotal(models.Model):
+    """Denormalized per-(game, round, team) score total, kept in step with Score."""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="round_totals")
+    round_number = models.PositiveIntegerField()
+    team = models.CharField(max_length=4, choices=TEAM_CHOICES)
+    total = models.PositiveIntegerField(default=0)
+    turns = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["game", "round_number", "team"], name="unique_team_round_total"),
+        ]
+
+    def __str__(self):
+        return f"Game {self.game_id} R{self.round_number} {self.team}: {self.total}"
+
+
+class GameProgress(models.Model):
+    """Where a game being scored is up to. Shared by every device scoring the game."""
+    game = models.OneToOneField(Game, on_delete=models.CASCADE, primary_key=True, related_name="progress")
+    current_round = models.PositiveIntegerField(default=1)
+    team_first = models.CharField(max_length=4, choices=TEAM_CHOICES, default="own", help_text="Which team goes first in the current round")
+
+    def __str__(self):
+        return f"Game {self.game_id}: Round {self.current_round}"
+
+    @classmethod
+    def for_game(cls, game):
+        """The game's progress row, created on first use for games started before it existed."""
+        try:
+            return game.progress
+        except cls.DoesNotExist:
+            latest_round = game.game_players.aggregate(models.Max("round_number"))["round_number__max"] or 1
+            progress, _ = cls.objects.get_or_create(
+                game=game,
+                defaults={"current_round": latest_round},
+            )
+            game.progress = progress
+            return progress
+
+
+RESULT_CHOICES = [
+    ('W', 'Win'),
+    ('L', 'Loss'),
+    ('D', 'Draw'),
+]
+
+
+class PlayerGameLine(models.Model):
+    """One player's figures for one game; PlayerCareer is the sum of these, kept in step by deltas."""
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="game_lines")
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="player_lines")
+    # Blank when the player has scores but no lineup row; 'own' wins if they played for both
+    team = models.CharField(max_length=4, choices=TEAM_CHOICES, blank=True)
+    total_score = models.PositiveIntegerField(default=0)
+    cycles = models.PositiveIntegerField(default=0)
+    rolls = models.PositiveIntegerField(default=0)
+    zero_cycles = models.PositiveIntegerField(default=0)
+    zero_rolls = models.PositiveIntegerField(default=0)
+    highest_cycle_score = models.PositiveIntegerField(null=True, blank=True)
+    highest_roll_score = models.PositiveIntegerField(null=True, blank=True)
+    # Game result, own-team lines only
+    result = models.CharField(max_length=1, choices=RESULT_CHOICES, blank=True)
+    # Copy of Game.date so a player's history can be paged on (date, game) from one index
+    game_date = models.DateField(null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["player", "game"], name="unique_player_game_line"),
+        ]
+        indexes = [
+            # Player game history, newest first, keyset-paginated (scores/history.py)
+            models.Index(fields=["player", "-game_date", "-game"], name="line_player_history_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.player_id} in game {self.game_id}: {self.total_score}"
+
+
+class PlayerCareer(models.Model):
+    """Career totals for player_statistics, maintained incrementally from PlayerGameLine."""
+    player = models.OneToOneField(Player, on_delete=models.CASCADE, primary_key=True, related_name="career")
+    games_participated = models.PositiveIntegerField(default=0)
+    total_score = models.PositiveIntegerField(default=0)
+    cycles = models.PositiveIntegerField(default=0)
+    rolls = models.PositiveIntegerField(default=0)
+    zero_cycles = models.PositiveIntegerField(default=0)
+    zero_rolls = models.PositiveIntegerField(default=0)
+    highest_cycle_score = models.PositiveIntegerField(null=True, blank=True)
+    highest_roll_score = models.PositiveIntegerField(null=True, blank=True)
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Career of player {self.player_id}: {self.total_score} over {self.cycles} cycles"
+
+
+class ChannelEvent(models.Model):
+    """A group_send, for the other worker processes to deliver (scores/channel_layer.py)."""
+    group_name = models.CharField(max_length=100)
+    message = models.JSONField()
+    origin = models.CharField(max_length=32, help_text="Channel layer instance that sent it")
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.group_name} #{self.id}"
+
+
+class ImportCheckpoint(models.Model):
+    """How far a results import has got (scores/importer.py); saved in each batch's transaction."""
+    name = models.CharField(max_length=255, unique=True)
+    source = models.CharField(max_length=1024, help_text="Absolute path of the file being imported")
+    rows = models.PositiveIntegerField(default=0, help_text="Rows committed so far")
+    last_game = models.CharField(max_length=255, blank=True)
+    games = models.PositiveIntegerField(default=0)
+    turns = models.PositiveIntegerField(default=0)
+    done = models.BooleanField(default=False)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.rows} rows{' (done)' if self.done else ''}"
@@ -0,0 +1,83 @@
+# scores/opponent_stats.py
+"""
+The opponent_statistics payload, at a fixed query cost.
+
+One query returns every matching game with its own/opp totals (correlated
+subqueries over TeamRoundTotal) and its location; one more returns the
+own-team players' figures over those games from PlayerGameLine. Record,
+averages, per-location splits, highs/lows and the diff series are all worked
+out in a single pass over the games.
+"""
+from collections import defaultdict
+
+from django.db.models import Sum
+
+from .models import Game, PlayerGameLine
+from .totals import annotate_game_results
+
+
+def opponent_stats(opponent, game_type=None):
+    """Returns (stats, chart_data); chart_data is None when there are no games."""
+    games_qs = Game.objects.filter(opponent=opponent)
+    if game_type is not None:
+        games_qs = games_qs.filter(game_type=game_type)
+    games = list(annotate_game_results(games_qs).select_related("location").order_by("date", "id"))
+    if not games:
+        return {"error": "No games found matching the selected criteria."}, None
+
+    record = {"Win": 0, "Loss": 0, "Draw": 0}
+    own_sum = opp_sum = 0
+    own_high = own_low = games[0].own_total
+    opp_high = opp_low = games[0].opp_total
+    by_location = defaultdict(lambda: {"wins": 0, "losses": 0, "draws": 0, "diff_sum": 0, "count": 0})
+    labels, diffs = [], []
+    for game in games:
+        diff = game.own_total - game.opp_total
+        record[game.result] += 1
+        own_sum += game.own_total
+        opp_sum += game.opp_total
+        own_high, own_low = max(own_high, game.own_total), min(own_low, game.own_total)
+        opp_high, opp_low = max(opp_high, game.opp_total), min(opp_low, game.opp_total)
+
+        location = by_location[game.location.name if game.location else "Unknown Location"]
+        location["count"] += 1
+        location["diff_sum"] += diff
+        location[{"Win": "wins", "Loss": "losses", "Draw": "draws"}[game.result]] += 1
+
+        labels.append(game.date.strftime("%Y-%m-%d"))
+        diffs.append(diff)
+
+    total_games = len(games)
+    stats = {
+        "total_games": total_games,
+        "wins": record["Win"], "losses": record["Loss"], "draws": record["Draw"],
+        "win_percentage": record["Win"] / total_games * 100,
+        "avg_score_for": own_sum / total_games,
+        "avg_score_against": opp_sum / total_games,
+        "highest_score_for": own_high, "lowest_score_for": own_low,
+        "highest_score_against": opp_high, "lowest_score_against": opp_low,
+        "location_stats": [
+            {
+                "name": name, "wins": loc["wins"], "losses": loc["losses"], "draws": loc["draws"],
+                "count": loc["count"], "avg_diff": loc["diff_sum"] / loc["count"],
+            }
+            for name, loc in sorted(by_location.items())
+        ],
+        "top_players": top_players(games_qs),
+    }
+    stats["avg_score_diff"] = stats["avg_score_for"] - stats["avg_score_against"]
+    return stats, {"labels": labels, "data": diffs}
+
+
+def top_players(games):
+    """Own-team players over a Game queryset, best total first."""
+    rows = (
+        PlayerGameLine.objects.filter(game__in=games, team="own", cycles__gt=0)
+        .values("player__name")
+        .annotate(total_score_vs_opp=Sum("total_score"), cycle_count_vs_opp=Sum("cycles"))
+        .order_by("-total_score_vs_opp", "player__name")
+    )
+    return [
+        {**row, "avg_score_vs_opp": row["total_score_vs_opp"] / row["cycle_count_vs_opp"]}
+        for row in rows
+    ]
@@ -0,0 +1,129 @@
+# scores/rules.py
+"""
+Somerset skittles scoring rules as a precomputed table.
+
+A turn is a fixed number of rolls at a rack of pins. Each roll knocks down at
+most the pins still standing. When the rack is cleared it is reset to full
+for the next roll, whether that took one roll (a strike) or several (a
+spare).
+
+RulesTable enumerates every legal turn once, with its total, the rolls
+after which the rack was reset and the strike/spare flags. It also records
+how many pins stand before each roll for every prefix of rolls, including
+prefixes that are themselves invalid, so the same per-roll messages as
+before can still be given for later rolls.
+
+Single turns are then checked with a dict lookup, arrays of turns with one
+NumPy fancy-indexing operation, and the browser gets the standing-pins map
+as JSON (live_game.html).
+"""
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+
+PINS = 9
+ROLLS = 3
+
+
+class TurnInfo:
+    __slots__ = ("rolls", "total", "resets", "strike", "spare")
+
+    def __init__(self, rolls, total, resets, strike, spare):
+        self.rolls = rolls
+        self.total = total
+        self.resets = resets  # Roll numbers (1-based) after which the rack was reset
+        self.strike = strike  # Some roll cleared a full rack on its own
+        self.spare = spare  # Some rack was cleared over more than one roll
+
+    def __repr__(self):
+        return f"TurnInfo({self.rolls}, total={self.total}, resets={self.resets})"
+
+
+class RulesTable:
+    def __init__(self, pins=PINS, rolls=ROLLS):
+        self.pins = pins
+        self.rolls = rolls
+        self.standing = {}  # prefix tuple -> pins standing before the next roll
+        self.turns = {}  # legal rolls tuple -> TurnInfo
+        for length in range(rolls):
+            for prefix in product(range(pins + 1), repeat=length):
+                self.standing[prefix] = self._standing_after(prefix)
+        self._enumerate((), (), False, False)
+
+        self.valid = np.zeros((pins + 1,) * rolls, dtype=bool)
+        self.totals = np.full((pins + 1,) * rolls, -1, dtype=np.int16)
+        for turn, info in self.turns.items():
+            self.valid[turn] = True
+            self.totals[turn] = info.total
+
+    def _standing_after(self, prefix):
+        standing = self.pins
+        for roll in prefix:
+            left = standing - roll
+            standing = self.pins if left <= 0 else left  # Cleared (or over-claimed): reset
+        return standing
+
+    def _enumerate(self, prefix, resets, strike, spare):
+        if len(prefix) == self.rolls:
+            self.turns[prefix] = TurnInfo(prefix, sum(prefix), resets, strike, spare)
+            return
+        standing = self.standing[prefix]
+        for roll in range(standing + 1):
+            rolls = prefix + (roll,)
+            if roll and roll == standing:
+                # Rack cleared: by one roll at a full rack (strike) or by finishing a part rack (spare)
+                full = standing == self.pins
+                self._enumerate(rolls, resets + (len(rolls),), strike or full, spare or not full)
+            else:
+                self._enumerate(rolls, resets, strike, spare)
+
+    # --- Lookups ---
+
+    def turn(self, rolls):
+        """TurnInfo for a legal turn, or None."""
+        return self.turns.get(tuple(rolls))
+
+    def is_valid(self, rolls):
+        return tuple(rolls) in self.turns
+
+    def valid_mask(self, rolls):
+        """Boolean array: which rows of an (n, rolls) integer array are legal turns."""
+        rolls = np.asarray(rolls, dtype=np.int64).reshape(-1, self.rolls)
+        in_range = ((rolls >= 0) & (rolls <= self.pins)).all(axis=1)
+        mask = np.zeros(len(rolls), dtype=bool)
+        mask[in_range] = self.valid[tuple(rolls[in_range].T)]
+        return mask
+
+    def errors(self, rolls):
+        """
+        [(roll number, message)] for a turn of in-range rolls, worded as ScoreForm
+        always has; empty when the turn is legal.
+        """
+        problems = []
+        for index in range(1, self.rolls):
+            standing = self.standing[tuple(rolls[:index])]
+            if rolls[index] > standing:
+                based_on = {1: "Roll 1", 2: "Rolls 1 & 2"}.get(index, f"Rolls 1-{index}")
+                problems.append((
+                    index + 1,
+                    f"Roll {index + 1} score ({rolls[index]}) cannot exceed pins standing ({standing}) based on {based_on}.",
+                ))
+        return problems
+
+    def as_json(self):
+        """The standing-pins map for the client, keyed by comma-joined roll prefixes."""
+        return {
+            "pins": self.pins,
+            "rolls": self.rolls,
+            "standing": {",".join(map(str, prefix)): standing for prefix, standing in self.standing.items()},
+        }
+
+
+@lru_cache(maxsize=None)
+def rules_table(pins=PINS, rolls=ROLLS):
+    """The shared table for a variant; built once per process."""
+    return RulesTable(pins, rolls)
+
+
+RULES = rules_table()  # The 9-pin, three-roll game the club plays
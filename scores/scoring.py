@@ -0,0 +1,161 @@
+# scores/scoring.py
+"""
+Writing turns for the round in play.
+
+The single-turn AJAX POST in live_game, the batch endpoint and score entry
+over the game's WebSocket (GameConsumer) all go through record_turns(): it locks the game row, assigns players and cycles from the
+RoundState scoring order, inserts every score with one bulk_create and keeps
+the cached state in step.
+"""
+from django.db import transaction
+
+from .broadcast import publish_on_commit
+from .forms import ScoreForm
+from .models import Game, Score
+from .rules import RULES
+from .signals import game_rows_changed
+from .state import get_round_state
+
+ROLL_FIELDS = ("roll1", "roll2", "roll3")
+
+
+class TurnError(Exception):
+    """A turn (or batch of turns) that cannot be recorded in the round's current state."""
+
+    def __init__(self, message, status=400, round_complete=False):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.round_complete = round_complete
+
+
+def _plain_int(value):
+    """value as an int if it is one (or a string of digits) within range, else None (left to ScoreForm)."""
+    if isinstance(value, str) and value.strip().isascii() and value.strip().isdigit():
+        value = int(value)
+    if type(value) is int and 0 <= value <= RULES.pins:
+        return value
+    return None
+
+
+def validate_turns(turns):
+    """
+    Check submitted turns against the Somerset rules. Turns of plain integers are checked
+    together with one RULES.valid_mask lookup; anything else, and every turn it rejects,
+    goes through ScoreForm so the errors read exactly as for a single POST. Returns
+    (rolls, errors) where rolls is a list of (roll1, roll2, roll3) tuples and errors maps
+    the turn index to its form errors.
+    """
+    plain = [
+        tuple(_plain_int(turn.get(field)) for field in ROLL_FIELDS) if isinstance(turn, dict) else None
+        for turn in turns
+    ]
+    candidates = [index for index, rolls in enumerate(plain) if rolls is not None and None not in rolls]
+    legal = set()
+    if candidates:
+        mask = RULES.valid_mask([plain[index] for index in candidates])
+        legal = {index for index, ok in zip(candidates, mask) if ok}
+
+    rolls = []
+    errors = {}
+    for index, turn in enumerate(turns):
+        if index in legal:
+            rolls.append(plain[index])
+            continue
+        form = ScoreForm(data=turn if isinstance(turn, dict) else {})
+        if form.is_valid():
+            data = form.cleaned_data
+            rolls.append((data["roll1"], data["roll2"], data["roll3"]))
+        else:
+            errors[index] = form.errors.get_json_data()
+    return rolls, errors
+
+
+def record_turns(game, round_number, team_first, rolls, start_turn=None):
+    """
+    Save consecutive turns for the round, starting at the current turn cursor.
+
+    start_turn, when given, must equal the cursor; a client replaying an offline
+    queue uses it so a retried batch is rejected instead of being stored twice.
+    Returns (round_state, scores).
+    """
+    with transaction.atomic():
+        # Lock the game row so two scoring devices can't claim the same turn
+        locked_version = Game.objects.select_for_update().values_list("version", flat=True).get(pk=game.pk)
+        game.version = locked_version
+        state = get_round_state(game, round_number, team_first)
+
+        if not state.scoring_order:
+            raise TurnError("No players found for this round.")
+        if state.round_complete:
+            raise TurnError("Round already complete.", round_complete=True)
+        if start_turn is not None and start_turn != state.cursor:
+            raise TurnError(f"Expected to start at turn {state.cursor}, not {start_turn}.", status=409)
+
+        order = state.scoring_order
+        remaining = len(order) * max(state.cycles_per_round, 1) - state.cursor
+        if len(rolls) > remaining:
+            raise TurnError(f"Only {remaining} turn(s) left in Round {round_number}.")
+
+        scores = []
+        for offset, (roll1, roll2, roll3) in enumerate(rolls):
+            turn = state.cursor + offset
+            scores.append(Score(
+                game=game,
+                player=order[turn % len(order)].player,
+                round_number=round_number,
+                cycle_number=turn // len(order) + 1,
+                roll1=roll1, roll2=roll2, roll3=roll3,
+                total=roll1 + roll2 + roll3,
+            ))
+        Score.objects.bulk_create(scores)
+        game_rows_changed(game.id, round_number)  # bulk_create skips model signals
+
+        # game_rows_changed bumped the version exactly once
+        game.version = locked_version + 1
+        for score in scores:
+            state.apply(score, version=game.version)
+        publish_on_commit(game.id, score_delta(state, scores))
+    return state, scores
+
+
+def score_payload(score):
+    """The JSON shape the scoreboard renders a row from."""
+    return {
+        'id': score.id, 'player__name': score.player.name, 'cycle_number': score.cycle_number,
+        'roll1': score.roll1, 'roll2': score.roll2, 'roll3': score.roll3, 'total': score.total,
+    }
+
+
+def _round_summary(round_state):
+    next_player = round_state.current_player_obj
+    return {
+        "round": round_state.round_number,
+        "seq": round_state.version,
+        "plus_minus": round_state.plus_minus,
+        "next_player": next_player.player.name if next_player else None,
+        "next_cycle": round_state.current_cycle,
+        "next_turn": round_state.cursor,
+        "message": round_state.as_dict()["message"],
+        "round_complete": round_state.round_complete,
+    }
+
+
+def score_delta(round_state, scores):
+    """
+    Compact description of a write for spectators: new rows, plus/minus and whose turn is next.
+    seq is Game.version after the write (one more than before it).
+    """
+    return {"type": "score", "scores": [score_payload(score) for score in scores], **_round_summary(round_state)}
+
+
+def score_snapshot(round_state):
+    """The whole round as of round_state.version, for a viewer that can't catch up from deltas."""
+    return {
+        "type": "snapshot",
+        "scores": [
+            {field: row[field] for field in ("id", "player__name", "cycle_number", "roll1", "roll2", "roll3", "total")}
+            for row in round_state.scores
+        ],
+        **_round_summary(round_state),
+    }
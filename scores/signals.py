@@ -0,0 +1,116 @@
+# scores/signals.py
+from django.db.models import F, Q, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .careers import forget_game_lines, refresh_player_lines
+from .models import Game, GamePlayer, GameType, Location, Opponent, Player, PlayerGameLine, Score
+from .totals import refresh_round_totals
+
+
+def game_rows_changed(game_id, *round_numbers):
+    """
+    Bookkeeping after Score/GamePlayer rows of a game were written or deleted.
+    Called by the receivers below, and directly by code paths that bypass
+    model signals (bulk_create, queryset updates).
+    """
+    for round_number in sorted(set(round_numbers)):
+        refresh_round_totals(game_id, round_number)
+    refresh_player_lines(game_id)
+    Game.objects.filter(pk=game_id).update(version=F("version") + 1)
+
+
+def _deleting_game(origin):
+    # Cascades from Game.delete() take the denormalized rows with them.
+    if isinstance(origin, QuerySet):
+        return origin.model is Game
+    return isinstance(origin, Game)
+
+
+@receiver(pre_save, sender=Score)
+@receiver(pre_save, sender=GamePlayer)
+def remember_previous_round(sender, instance, **kwargs):
+    """Keep the old (game, round) so an edit that moves a row refreshes both rounds."""
+    instance._previous_round = None
+    if instance.pk:
+        instance._previous_round = (
+            sender.objects.filter(pk=instance.pk).values_list("game_id", "round_number").first()
+        )
+
+
+@receiver(post_save, sender=Score)
+@receiver(post_save, sender=GamePlayer)
+def refresh_totals_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_round", None)
+    if previous and previous[0] != instance.game_id:
+        game_rows_changed(*previous)
+        previous = None
+    rounds = [instance.round_number] + ([previous[1]] if previous else [])
+    game_rows_changed(instance.game_id, *rounds)
+
+
+@receiver(post_delete, sender=Score)
+@receiver(post_delete, sender=GamePlayer)
+def refresh_totals_on_delete(sender, instance, origin=None, **kwargs):
+    if _deleting_game(origin):
+        return
+    game_rows_changed(instance.game_id, instance.round_number)
+
+
+@receiver(pre_delete, sender=Game)
+def remove_game_from_careers(sender, instance, **kwargs):
+    forget_game_lines(instance.pk)
+
+
+@receiver(post_save, sender=Game)
+def game_edited(sender, instance, created, **kwargs):
+    """
+    An edit to the game itself (date, opponent, ...) bumps its version too, so version-keyed
+    caches and API ETags move on; PlayerGameLine keeps a copy of the date for paging history.
+    """
+    if created:
+        return
+    PlayerGameLine.objects.filter(game_id=instance.pk).exclude(game_date=instance.date).update(
+        game_date=instance.date
+    )
+    Game.objects.filter(pk=instance.pk).update(version=F("version") + 1)
+
+
+# --- Names shown in game payloads ---
+
+def _games_showing(sender, pk):
+    if sender is Player:
+        return Game.objects.filter(Q(game_players__player_id=pk) | Q(scores__player_id=pk))
+    return Game.objects.filter(**{{Opponent: "opponent_id", Location: "location_id", GameType: "game_type_id"}[sender]: pk})
+
+
+@receiver(pre_save, sender=Opponent)
+@receiver(pre_save, sender=Location)
+@receiver(pre_save, sender=GameType)
+@receiver(pre_save, sender=Player)
+def remember_previous_name(sender, instance, **kwargs):
+    instance._previous_name = None
+    if instance.pk:
+        instance._previous_name = sender.objects.filter(pk=instance.pk).values_list("name", flat=True).first()
+
+
+@receiver(post_save, sender=Opponent)
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=GameType)
+@receiver(post_save, sender=Player)
+def name_edited(sender, instance, created, **kwargs):
+    """
+    Game payloads (API, stats pages) carry these names but Game.version knows nothing of
+    them, so a rename bumps the version of every game that shows the name.
+    """
+    previous = getattr(instance, "_previous_name", None)
+    if created or previous is None or previous == instance.name:
+        return
+    Game.objects.filter(pk__in=_games_showing(sender, instance.pk).values("pk")).update(version=F("version") + 1)
+
+
+@receiver(pre_delete, sender=Location)
+@receiver(pre_delete, sender=GameType)
+def name_removed(sender, instance, **kwargs):
+    # SET_NULL clears the games' foreign key with a queryset update, which sends no Game signal
+    Game.objects.filter(pk__in=_games_showing(sender, instance.pk).values("pk")).update(version=F("version") + 1)
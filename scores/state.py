@@ -0,0 +1,179 @@
+# scores/state.py
+"""
+Process-local scoring state for the round being played.
+
+A RoundState is built from the database once (lineup + scores, two queries),
+then updated in place as this process saves scores. Each entry remembers the
+Game.version it reflects; Game.version is bumped on every Score/GamePlayer
+change, so a write from another worker makes the entry stale and it is
+rebuilt on next use. The version comes for free with the Game row the views
+already load.
+"""
+import threading
+from collections import OrderedDict
+from itertools import zip_longest
+
+from .models import GamePlayer, Score
+
+MAX_CACHED_ROUNDS = 128
+
+SCORE_FIELDS = ("id", "player_id", "player__name", "cycle_number", "roll1", "roll2", "roll3", "total")
+
+
+def interleave_teams(own_team, opp_team, team_first):
+    """Alternate the two lineups, starting with team_first ('own' or 'opp')."""
+    first, second = (own_team, opp_team) if team_first == "own" else (opp_team, own_team)
+    scoring_order = []
+    for a, b in zip_longest(first, second):
+        if a: scoring_order.append(a)
+        if b: scoring_order.append(b)
+    return scoring_order
+
+
+class RoundState:
+    """Scoring order, cursor, running totals and score list for one (game, round)."""
+
+    def __init__(self, game_id, round_number, team_first, cycles_per_round, version, lineup, scores):
+        self.game_id = game_id
+        self.round_number = round_number
+        self.team_first = team_first
+        self.cycles_per_round = cycles_per_round
+        self.version = version
+        self.lineup = lineup
+        self.scoring_order = interleave_teams(
+            [gp for gp in lineup if gp.team == "own"],
+            [gp for gp in lineup if gp.team == "opp"],
+            team_first,
+        )
+        self.team_by_player = {gp.player_id: gp.team for gp in lineup}
+        self.scores = []
+        self.team_totals = {"own": 0, "opp": 0}
+        for score in scores:
+            self._add(score)
+
+    @classmethod
+    def build(cls, game, round_number, team_first):
+        lineup = list(
+            GamePlayer.objects.filter(game=game, round_number=round_number)
+            .select_related("player")
+            .order_by("id")
+        )
+        scores = Score.objects.filter(game=game, round_number=round_number).order_by("cycle_number", "id")
+        return cls(
+            game.id, round_number, team_first, game.cycles_per_round, game.version,
+            lineup, list(scores.values(*SCORE_FIELDS)),
+        )
+
+    def is_current(self, game, team_first):
+        return (
+            self.version == game.version
+            and self.team_first == team_first
+            and self.cycles_per_round == game.cycles_per_round
+        )
+
+    def has_team(self, team):
+        return any(gp.team == team for gp in self.lineup)
+
+    # --- Turn cursor ---
+    @property
+    def cursor(self):
+        return len(self.scores)
+
+    @property
+    def current_cycle(self):
+        if not self.scoring_order:
+            return 1
+        return self.cursor // len(self.scoring_order) + 1
+
+    @property
+    def round_complete(self):
+        return bool(self.scoring_order) and self.current_cycle > max(self.cycles_per_round, 1)
+
+    @property
+    def current_player_obj(self):
+        if not self.scoring_order or self.round_complete:
+            return None
+        return self.scoring_order[self.cursor % len(self.scoring_order)]
+
+    @property
+    def plus_minus(self):
+        return self.team_totals["own"] - self.team_totals["opp"]
+
+    # --- Updates ---
+    def _add(self, score):
+        self.scores.append(score)
+        team = self.team_by_player.get(score["player_id"])
+        if team in self.team_totals:
+            self.team_totals[team] += score["total"] or 0
+
+    def apply(self, score, version):
+        """Record a Score this process has just saved; version is Game.version after the write."""
+        self._add({
+            "id": score.id, "player_id": score.player_id, "player__name": score.player.name,
+            "cycle_number": score.cycle_number, "roll1": score.roll1, "roll2": score.roll2,
+            "roll3": score.roll3, "total": score.total,
+        })
+        self.version = version
+
+    def as_dict(self):
+        """The dict shape live_game has always consumed from get_game_state."""
+        if not self.scoring_order:
+            return {
+                "message": f"Set up teams for Round {self.round_number}.",
+                "current_player": None,
+                "current_player_obj": None,
+                "current_cycle": 1,
+                "plus_minus": 0,
+                "scores_data": [],
+                "round_complete": False,
+                "error": "No players found...",
+                "round_state": self,
+            }
+
+        current_player_obj = self.current_player_obj
+        current_player = current_player_obj.player if current_player_obj else None
+        if self.round_complete:
+            message = f"Round {self.round_number} Complete!"
+        else:
+            message = f"Enter score for {current_player.name} (Cycle {self.current_cycle} of Round {self.round_number})"
+
+        return {
+            "message": message,
+            "current_player": current_player,
+            "current_player_obj": current_player_obj,
+            "current_cycle": self.current_cycle,
+            "plus_minus": self.plus_minus,
+            "scores_data": list(self.scores),
+            "round_complete": self.round_complete,
+            "error": None,
+            "round_state": self,
+        }
+
+
+# --- Process-local cache ---
+_states = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_round_state(game, round_number, team_first):
+    """Return a RoundState for the game's current version, rebuilding it if stale."""
+    key = (game.id, round_number)
+    with _lock:
+        state = _states.get(key)
+        if state is not None and state.is_current(game, team_first):
+            _states.move_to_end(key)
+            return state
+
+    state = RoundState.build(game, round_number, team_first)
+    with _lock:
+        _states[key] = state
+        _states.move_to_end(key)
+        while len(_states) > MAX_CACHED_ROUNDS:
+            _states.popitem(last=False)
+    return state
+
+
+def forget_game(game_id):
+    with _lock:
+        for key in [k for k in _states if k[0] == game_id]:
+            del _states[key]
@@ -0,0 +1,96 @@
+# scores/synthetic.py
+"""
+Synthetic league data for query-plan checks and benchmarks.
+
+Everything is inserted with bulk_create, so the derived tables (round
+totals, player lines and careers) are rebuilt explicitly at the end instead
+of through the model signals.
+"""
+import random
+from datetime import date, timedelta
+
+from .models import Game, GamePlayer, GameType, Location, Opponent, Player, Score
+from .careers import rebuild_careers
+from .rules import RULES
+from .totals import rebuild_round_totals
+
+NAME_PREFIX = "Synthetic"
+
+
+def random_turn(rng, rules=RULES):
+    """A turn that passes the Somerset rules: each roll is uniform over the pins standing."""
+    rolls = ()
+    for _ in range(rules.rolls):
+        rolls += (rng.randint(0, rules.standing[rolls]),)
+    return rolls
+
+
+def _get_or_create_named(model, names):
+    existing = {obj.name: obj for obj in model.objects.filter(name__in=names)}
+    missing = [model(name=name) for name in names if name not in existing]
+    for obj in model.objects.bulk_create(missing):
+        existing[obj.name] = obj
+    return [existing[name] for name in names]
+
+
+def generate_league(seasons=3, games_per_season=60, opponents=12, locations=6, players=16,
+                    lineup_size=6, rounds=3, cycles=3, seed=0, start_year=None):
+    """
+    Create seasons x games_per_season games with full lineups and scores.
+    Returns a summary dict with the ids and row counts that were created.
+    """
+    rng = random.Random(seed)
+    start_year = start_year or date.today().year - seasons + 1
+
+    opponent_objs = _get_or_create_named(Opponent, [f"{NAME_PREFIX} Opponent {i}" for i in range(opponents)])
+    location_objs = _get_or_create_named(Location, [f"{NAME_PREFIX} Location {i}" for i in range(locations)])
+    game_types = _get_or_create_named(GameType, [f"{NAME_PREFIX} League", f"{NAME_PREFIX} Friendly", f"{NAME_PREFIX} Cup"])
+    own_players = _get_or_create_named(Player, [f"{NAME_PREFIX} Player {i}" for i in range(players)])
+    opp_players = {p.id: o for p, o in zip(
+        own_players, _get_or_create_named(Player, [f"Opp. {p.name}" for p in own_players])
+    )}
+
+    games = []
+    for season in range(seasons):
+        season_start = date(start_year + season, 4, 1)
+        for g in range(games_per_season):
+            games.append(Game(
+                date=season_start + timedelta(days=(g * 180) // max(games_per_season, 1)),
+                opponent=rng.choice(opponent_objs),
+                location=rng.choice(location_objs),
+                game_type=rng.choice(game_types),
+                cycles_per_round=cycles,
+            ))
+    games = Game.objects.bulk_create(games, batch_size=1000)
+
+    lineups = []
+    scores = []
+    for game in games:
+        for round_number in range(1, rounds + 1):
+            own = rng.sample(own_players, min(lineup_size, len(own_players)))
+            opp = [opp_players[p.id] for p in own]
+            lineups += [GamePlayer(game=game, player=p, round_number=round_number, team="own") for p in own]
+            lineups += [GamePlayer(game=game, player=p, round_number=round_number, team="opp") for p in opp]
+            order = [p for pair in zip(own, opp) for p in pair]
+            for cycle in range(1, cycles + 1):
+                for player in order:
+                    roll1, roll2, roll3 = random_turn(rng)
+                    scores.append(Score(
+                        game=game, player=player, round_number=round_number, cycle_number=cycle,
+                        roll1=roll1, roll2=roll2, roll3=roll3, total=roll1 + roll2 + roll3,
+                    ))
+    GamePlayer.objects.bulk_create(lineups, batch_size=2000)
+    Score.objects.bulk_create(scores, batch_size=2000)
+
+    game_ids = [game.id for game in games]
+    rebuild_round_totals(game_ids)
+    rebuild_careers(game_ids)
+    return {
+        "game_ids": game_ids,
+        "player_ids": [p.id for p in own_players],
+        "opponent_ids": [o.id for o in opponent_objs],
+        "game_type_ids": [t.id for t in game_types],
+        "games": len(games),
+        "game_players": len(lineups),
+        "scores": len(scores),
+    }
@@ -1,3 +1,290 @@
-from django.test import TestCase
+import asyncio
+import csv
+import os
+import tempfile
+import warnings
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .export import FORMATS, aexport_text, export_rows, filtered_scores
+from .importer import ResultsImporter
+from .channel_layer import DatabaseChannelLayer
+from .careers import _line_values, career_mismatches, compute_lines
+from .models import (
+    Game, GamePlayer, ImportCheckpoint, Location, Opponent, Player, PlayerGameLine, Score, TeamRoundTotal,
+)
+from .synthetic import generate_league
+from .totals import rebuild_round_totals
+
+
+def _round_totals():
+    # refresh_round_totals keeps a zero row for a team that hasn't bowled yet; a rebuild leaves it out
+    return sorted(TeamRoundTotal.objects.filter(turns__gt=0).values_list("game_id", "round_number", "team", "total", "turns"))
+
+
+class IncrementalUpkeepTests(TestCase):
+    """PlayerCareer, PlayerGameLine and TeamRoundTotal kept in step by the signals, checked against a rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_league(seasons=1, games_per_season=4, rounds=2, cycles=2, players=6, lineup_size=3, seed=11)
+
+    def assertInStep(self):
+        self.assertEqual(career_mismatches(), [])
+        stored_lines = {
+            (line.game_id, line.player_id): _line_values(line) for line in PlayerGameLine.objects.all()
+        }
+        self.assertEqual(stored_lines, compute_lines(None))
+        maintained = _round_totals()
+        rebuild_round_totals()
+        self.assertEqual(maintained, _round_totals())
+
+    def new_game(self):
+        game = Game.objects.create(date="2026-01-01", opponent_id=self.data["opponent_ids"][0], cycles_per_round=2)
+        players = list(Player.objects.filter(pk__in=self.data["player_ids"][:2]))
+        for player in players:
+            GamePlayer.objects.create(game=game, player=player, round_number=1, team="own")
+            GamePlayer.objects.create(
+                game=game, player=Player.objects.get(name=f"Opp. {player.name}"), round_number=1, team="opp",
+            )
+        return game, players
+
+    def add_score(self, game, player, cycle, rolls):
+        return Score.objects.create(
+            game=game, player=player, round_number=1, cycle_number=cycle,
+            roll1=rolls[0], roll2=rolls[1], roll3=rolls[2], total=sum(rolls),
+        )
+
+    def test_generated_league_starts_in_step(self):
+        self.assertInStep()
+
+    def test_insert_scores(self):
+        game, (first, second) = self.new_game()
+        self.assertInStep()
+        self.add_score(game, first, 1, (9, 9, 9))
+        self.assertInStep()
+        self.add_score(game, second, 1, (0, 0, 0))
+        self.add_score(game, first, 2, (3, 4, 0))
+        self.assertInStep()
+
+    def test_edit_score_lowers_maxima(self):
+        game, (first, _) = self.new_game()
+        best = self.add_score(game, first, 1, (9, 9, 9))
+        self.add_score(game, first, 2, (1, 2, 3))
+        self.assertInStep()
+        # The career highest came from this turn, so it has to be re-read from the other lines
+        best.roll1 = best.roll2 = best.roll3 = best.total = 0
+        best.save()
+        self.assertInStep()
+
+    def test_move_score_to_another_game_and_player(self):
+        game, (first, _) = self.new_game()
+        score = self.add_score(game, first, 1, (5, 4, 2))
+        score.game_id = self.data["game_ids"][0]
+        score.player = Player.objects.get(pk=self.data["player_ids"][4])
+        score.save()
+        self.assertInStep()
+
+    def test_delete_score_and_lineup(self):
+        game, (first, second) = self.new_game()
+        self.add_score(game, first, 1, (9, 9, 9))
+        self.add_score(game, second, 1, (2, 2, 2))
+        Score.objects.filter(game=game, player=first).delete()
+        self.assertInStep()
+        GamePlayer.objects.filter(game=game, player=second).delete()
+        self.assertInStep()
+
+    def test_delete_games(self):
+        Game.objects.get(pk=self.data["game_ids"][0]).delete()
+        self.assertInStep()
+        # Several at once: no career maximum may be re-read from another game in the same delete
+        Game.objects.filter(pk__in=self.data["game_ids"][1:]).delete()
+        self.assertInStep()
+        self.assertFalse(PlayerGameLine.objects.exists())
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class ApiETagTests(TestCase):
+    """A rename changes the payload, so it must change the ETag too."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_league(seasons=1, games_per_season=2, rounds=1, cycles=1, players=3, lineup_size=2, seed=3)
+        cls.game = Game.objects.select_related("opponent", "location").get(pk=cls.data["game_ids"][0])
+
+    def assertRefetched(self, url, rename):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        rename()
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.content, first.content)
+
+    def rename(self, obj):
+        def rename():
+            obj.name = f"{obj.name} (renamed)"
+            obj.save()
+        return rename
+
+    def test_opponent_rename(self):
+        opponent = Opponent.objects.get(pk=self.game.opponent_id)
+        self.assertRefetched(reverse("api_game", args=[self.game.id]), self.rename(opponent))
+
+    def test_location_rename_in_games_list(self):
+        location = Location.objects.get(pk=self.game.location_id)
+        self.assertRefetched(reverse("api_games") + "?limit=50", self.rename(location))
+
+    def test_player_rename_in_scorecard(self):
+        player = Player.objects.get(pk=GamePlayer.objects.filter(game=self.game).first().player_id)
+        self.assertRefetched(reverse("api_game_scorecard", args=[self.game.id]), self.rename(player))
+
+    def test_location_delete(self):
+        location = Location.objects.get(pk=self.game.location_id)
+        self.assertRefetched(reverse("api_game", args=[self.game.id]), location.delete)
+
+
+class ImportResumeTests(TransactionTestCase):
+    """A batch and its checkpoint commit together, so a resumed import never repeats a batch."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".csv")
+        self.addCleanup(os.remove, self.path)
+        with os.fdopen(handle, "w", newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow(["game", "date", "opponent", "round", "cycle", "team", "player", "roll1", "roll2", "roll3"])
+            for game in range(4):
+                for team, player in (("own", "Resume Own"), ("opp", "Resume Opp")):
+                    writer.writerow([f"G{game}", "2001-05-01", "Resume Opponent", 1, 1, team, player, 3, 4, 0])
+
+    def importer(self):
+        return ResultsImporter(batch_size=2, checkpoint="resume-test")  # One two-turn game per batch
+
+    def test_crash_after_batch_commit(self):
+        importer = self.importer()
+        save = importer._save_checkpoint
+        calls = []
+
+        def crash_on_second_batch(*args, **kwargs):
+            calls.append(args)
+            save(*args, **kwargs)
+            if len(calls) == 2:
+                raise RuntimeError("killed")  # After the writes, before the commit
+
+        with mock.patch.object(importer, "_save_checkpoint", crash_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                importer.run(self.path)
+        # The second batch rolled back together with its checkpoint
+        self.assertEqual(Game.objects.count(), 1)
+        self.assertEqual(ImportCheckpoint.objects.get(name="resume-test").rows, 2)
+
+        result = self.importer().run(self.path, resume=True)
+        self.assertEqual(result["skipped_rows"], 2)
+        self.assertEqual(Game.objects.count(), 4)
+        self.assertEqual(Score.objects.count(), 8)
+        self.assertTrue(ImportCheckpoint.objects.get(name="resume-test").done)
+
+    def test_existing_checkpoint_needs_resume_or_restart(self):
+        self.importer().run(self.path)
+        with self.assertRaises(ValueError):
+            self.importer().run(self.path)
+        self.importer().run(self.path, restart=True)
+        self.assertEqual(Game.objects.count(), 8)
+
+
+@override_settings(
+    ALLOWED_HOSTS=["testserver"],
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class GameSocketOriginTests(TransactionTestCase):
+    """The game socket takes staff score writes on the session cookie alone, so its Origin must be checked."""
+
+    def connects(self, origin):
+        from keiths_skittles.asgi import application
+
+        async def attempt():
+            headers = [(b"origin", origin.encode())] if origin else []
+            communicator = WebsocketCommunicator(application, "/ws/game/1/", headers=headers)
+            connected, _ = await communicator.connect()
+            if connected:
+                await communicator.disconnect()
+            return connected
+        return async_to_sync(attempt)()
+
+    def test_untrusted_origin_is_rejected(self):
+        self.assertFalse(self.connects("https://evil.example"))
+
+    def test_missing_origin_is_rejected(self):
+        self.assertFalse(self.connects(None))
+
+    def test_own_origin_is_accepted(self):
+        self.assertTrue(self.connects("http://testserver"))
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class ExportStreamingTests(TransactionTestCase):
+    """Under ASGI a sync streaming body is buffered whole, so the export must stream asynchronously."""
+
+    def setUp(self):
+        generate_league(seasons=1, games_per_season=3, rounds=1, cycles=2, players=3, lineup_size=2, seed=5)
+        staff = get_user_model().objects.create_user("export-staff", is_staff=True)
+        self.async_client.force_login(staff)
+
+    def expected(self, export_format):
+        write_lines, _ = FORMATS[export_format]
+        return "".join(write_lines(export_rows(filtered_scores())))
+
+    async def test_export_streams_through_asgi(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # StreamingHttpResponse warns when it has to buffer a sync iterator
+            response = await self.async_client.get(reverse("export_scores"))
+            self.assertTrue(response.is_async)
+            body = b"".join([part async for part in response])
+        self.assertEqual(body.decode(), await sync_to_async(self.expected)("csv"))
+
+    async def test_chunks_match_the_sync_export(self):
+        for export_format in FORMATS:
+            write_lines, _ = FORMATS[export_format]
+            parts = [part async for part in aexport_text(write_lines, filtered_scores(), chunk_size=4)]
+            self.assertGreater(len(parts), 1)
+            self.assertEqual("".join(parts), await sync_to_async(self.expected)(export_format))
+
+    async def test_empty_export_is_header_only(self):
+        write_lines, _ = FORMATS["csv"]
+        parts = [part async for part in aexport_text(write_lines, filtered_scores(date_from="2999-01-01"))]
+        self.assertEqual(parts, ["".join(write_lines([]))])
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class PlayerStatisticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_league(seasons=1, games_per_season=2, rounds=1, cycles=1, players=3, lineup_size=2, seed=7)
+
+    def test_known_player(self):
+        response = self.client.get(reverse("player_statistics"), {"player_id": self.data["player_ids"][0]})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_player_is_404(self):
+        for player_id in ("999999", "abc"):
+            response = self.client.get(reverse("player_statistics"), {"player_id": player_id})
+            self.assertEqual(response.status_code, 404)
+
+
+class DatabaseChannelLayerTests(TransactionTestCase):
+    def test_event_sent_right_after_group_add_is_delivered(self):
+        async def scenario():
+            receiver, sender = DatabaseChannelLayer(poll_interval=0.01), DatabaseChannelLayer()
+            channel = await receiver.new_channel()
+            await receiver.group_add("game_1", channel)
+            # Another worker sends before the receiver's poller has run at all
+            await sender.group_send("game_1", {"type": "game.update", "data": {"seq": 1}})
+            return await asyncio.wait_for(receiver.receive(channel), timeout=5)
+
+        message = async_to_sync(scenario)()
+        self.assertEqual(message["data"], {"seq": 1})
@@ -0,0 +1,131 @@
+# scores/totals.py
+"""
+Maintenance of the denormalized TeamRoundTotal table.
+
+Team membership is decided per round by GamePlayer, so a round's totals are
+recomputed from that round's scores whenever one of them (or the lineup)
+changes. A round only ever holds a few dozen scores, which keeps the refresh
+cheap enough to run inside the same transaction as the score write.
+"""
+from django.db.models import Case, CharField, Count, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import GamePlayer, Score, TeamRoundTotal
+
+TEAMS = ("own", "opp")
+
+
+def lineup_team():
+    """Expression for a Score's team ('own'/'opp'), taken from its round's GamePlayer row."""
+    return Subquery(
+        GamePlayer.objects.filter(
+            game_id=OuterRef("game_id"),
+            round_number=OuterRef("round_number"),
+            player_id=OuterRef("player_id"),
+        ).values("team")[:1]
+    )
+
+
+def _team_sums(scores_qs):
+    """Group a Score queryset by (game, round, team) using the round's lineup."""
+    return (
+        scores_qs.annotate(team=lineup_team())
+        .values("game_id", "round_number", "team")
+        .annotate(team_total=Sum("total"), team_turns=Count("id"))
+        .order_by()
+    )
+
+
+def refresh_round_totals(game_id, round_number):
+    """Recompute both team rows for one round of one game. Returns the round's turn count."""
+    sums = {
+        row["team"]: row
+        for row in _team_sums(Score.objects.filter(game_id=game_id, round_number=round_number))
+        if row["team"] in TEAMS
+    }
+    rows = [
+        TeamRoundTotal(
+            game_id=game_id,
+            round_number=round_number,
+            team=team,
+            total=sums[team]["team_total"] if team in sums else 0,
+            turns=sums[team]["team_turns"] if team in sums else 0,
+        )
+        for team in TEAMS
+    ]
+    TeamRoundTotal.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["game", "round_number", "team"],
+        update_fields=["total", "turns"],
+    )
+    return sum(row.turns for row in rows)
+
+
+def rebuild_round_totals(game_ids=None):
+    """Throw away and recompute the table (optionally only for some games). Returns rows written."""
+    scores_qs = Score.objects.all()
+    existing = TeamRoundTotal.objects.all()
+    if game_ids is not None:
+        scores_qs = scores_qs.filter(game_id__in=game_ids)
+        existing = existing.filter(game_id__in=game_ids)
+
+    rows = [
+        TeamRoundTotal(
+            game_id=row["game_id"],
+            round_number=row["round_number"],
+            team=row["team"],
+            total=row["team_total"] or 0,
+            turns=row["team_turns"],
+        )
+        for row in _team_sums(scores_qs).iterator()
+        if row["team"] in TEAMS
+    ]
+    existing.delete()
+    TeamRoundTotal.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def game_team_totals(game_ids):
+    """Return {game_id: {'own': n, 'opp': n}} for the given games in a single query."""
+    totals = {gid: {"own": 0, "opp": 0} for gid in game_ids}
+    rows = (
+        TeamRoundTotal.objects.filter(game_id__in=game_ids)
+        .values("game_id", "team")
+        .annotate(team_total=Sum("total"))
+        .order_by()
+    )
+    for row in rows:
+        totals.setdefault(row["game_id"], {"own": 0, "opp": 0})[row["team"]] = row["team_total"] or 0
+    return totals
+
+
+def _team_total_subquery(team):
+    return Coalesce(
+        Subquery(
+            TeamRoundTotal.objects.filter(game=OuterRef("pk"), team=team)
+            .values("game")
+            .annotate(team_total=Sum("total"))
+            .values("team_total")[:1]
+        ),
+        0,
+    )
+
+
+def annotate_game_results(games_qs):
+    """
+    Annotate a Game queryset with own_total, opp_total and result ('Win'/'Loss'/'Draw').
+    Correlated subqueries rather than a join + GROUP BY, so an ORDER BY date ... LIMIT
+    page can walk the date index and only total the games it returns.
+    """
+    return games_qs.annotate(
+        own_total=_team_total_subquery("own"),
+        opp_total=_team_total_subquery("opp"),
+    ).annotate(
+        result=Case(
+            When(own_total__gt=F("opp_total"), then=Value("Win")),
+            When(own_total__lt=F("opp_total"), then=Value("Loss")),
+            default=Value("Draw"),
+            output_field=CharField(),
+        )
+    )
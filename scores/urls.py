@@ -1,6 +1,6 @@
 # scores/urls.py
 from django.urls import path
-from . import views
+from . import api, views
 
 # app_name = 'scores' # Optional: Define an app namespace
 
@@ -30,7 +30,23 @@ urlpatterns = [
     # AJAX URLs (prefixing with ajax/ is good practice)
     path('ajax/add-opponent/', views.ajax_add_opponent, name='ajax_add_opponent'),
     path('ajax/add-location/', views.ajax_add_location, name='ajax_add_location'),
+    path('ajax/game/<int:game_id>/scores/batch/', views.ajax_submit_score_batch, name='ajax_submit_score_batch'),
     path('ajax/player/<int:player_id>/games/page/<int:page_num>/',
          views.player_game_history_page,
          name='ajax_player_game_history'),
+    path('ajax/player/<int:player_id>/games/',
+         views.player_game_history,
+         name='ajax_player_game_history_cursor'),
+    path('ajax/past-games/feed/', views.past_games_feed, name='past_games_feed'),
+    path('ajax/leaderboards/', views.ajax_leaderboards, name='ajax_leaderboards'),
+    path('export/scores/', views.export_scores, name='export_scores'),
+    path('ajax/debug/query-timings/', views.query_timings, name='query_timings'),
+    path('ajax/debug/live-connections/', views.live_connections, name='live_connections'),
+
+    # Read-only JSON API (conditional GETs; see scores/api.py)
+    path('api/games/', api.games, name='api_games'),
+    path('api/games/<int:game_id>/', api.game, name='api_game'),
+    path('api/games/<int:game_id>/scorecard/', api.game_scorecard, name='api_game_scorecard'),
+    path('api/players/<int:player_id>/', api.player, name='api_player'),
+    path('api/opponents/<int:opponent_id>/', api.opponent, name='api_opponent'),
 ]
\ No newline at end of file
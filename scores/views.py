@@ -1,21 +1,34 @@
 
+import asyncio
 import json
-from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Sum, Max, Min, Count, F, FloatField, ExpressionWrapper, Case, When, Value, Q, Avg, OuterRef, Exists
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
-from django.db.models.functions import Coalesce
 from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from itertools import zip_longest
 import logging # Use standard logging
 
 from django.db import transaction # For atomic operations if needed
 
 # --- CORRECTED IMPORT ---
-from .models import Game, Player, GamePlayer, Score, Opponent, Location, GameType # Added GameType
+from .models import Game, GameProgress, Player, PlayerCareer, GamePlayer, Opponent, Location, GameType # Added GameType
 # --- END CORRECTION ---
+from .analytics import get_player_analytics
+from .consumers import connection_counts
+from .export import FORMATS as EXPORT_FORMATS, aexport_text, filtered_scores
+from .game_stats import get_game_stats
+from .history import DEFAULT_FEED_SIZE, InvalidCursor, encode_cursor, games_feed_page, player_history_page
+from .leaderboards import available_seasons, get_leaderboards
+from .middleware import recent_requests
+from .opponent_stats import opponent_stats
+from .rules import RULES
+from .scoring import TurnError, record_turns, score_payload, validate_turns
+from .signals import game_rows_changed
+from .state import forget_game, get_round_state
+from .totals import annotate_game_results
 
 from .forms import (
     GameSetupForm,
@@ -24,91 +37,9 @@ from .forms import (
     PlayerForm,
     RoundOptionsForm
 )
-def get_game_state(game, current_round, request):
-    own_team = list(
-        game.game_players
-        .filter(round_number=current_round, team="own")
-        .select_related("player")
-        .order_by("id")
-    )
-    opp_team = list(
-        game.game_players
-        .filter(round_number=current_round, team="opp")
-        .select_related("player")
-        .order_by("id")
-    )
-
-    round_team_first_key = f"round_{current_round}_team_first"
-    round_team_first = request.session.get(round_team_first_key, request.session.get("round_team_first", "own"))
-
-    # Interleave players based on team that goes first
-    scoring_order = []
-    if round_team_first == "own":
-        for own, opp in zip_longest(own_team, opp_team):
-            if own: scoring_order.append(own)
-            if opp: scoring_order.append(opp)
-    else:
-        for opp, own in zip_longest(opp_team, own_team):
-            if opp: scoring_order.append(opp)
-            if own: scoring_order.append(own)
-
-    total_turns = len(scoring_order)
-
-    if total_turns == 0:
-        return {
-            "message": f"Set up teams for Round {current_round}.",
-            "current_player": None,
-            "current_player_obj": None,
-            "current_cycle": 1,
-            "plus_minus": 0,
-            "scores_data": [],
-            "scores_qs": Score.objects.none(),
-            "round_complete": False,
-            "error": "No players found..."
-        }
-
-    scores_entered = Score.objects.filter(game=game, round_number=current_round).count()
-    cycles_per_round = max(game.cycles_per_round, 1)
-    current_cycle = (scores_entered // total_turns) + 1
-    next_index = scores_entered % total_turns
-
-    if current_cycle > cycles_per_round:
-        message = f"Round {current_round} Complete!"
-        round_complete = True
-        current_player = current_player_obj = None
-    elif next_index < total_turns:
-        current_player_obj = scoring_order[next_index]
-        current_player = current_player_obj.player
-        message = f"Enter score for {current_player.name} (Cycle {current_cycle} of Round {current_round})"
-        round_complete = False
-    else:
-        message = "Error determining next player."
-        current_player = current_player_obj = None
-        round_complete = False
-
-    own_team_ids = [gp.player.id for gp in own_team]
-    opp_team_ids = [gp.player.id for gp in opp_team]
-
-    scores_qs = game.scores.filter(round_number=current_round).select_related("player").order_by("cycle_number", "id")
-    own_total = scores_qs.filter(player_id__in=own_team_ids).aggregate(total=Coalesce(Sum("total"), 0))["total"]
-    opp_total = scores_qs.filter(player_id__in=opp_team_ids).aggregate(total=Coalesce(Sum("total"), 0))["total"]
-    plus_minus = own_total - opp_total
-
-    scores_data = list(scores_qs.values(
-        'player__name', 'cycle_number', 'roll1', 'roll2', 'roll3', 'total', 'id'
-    ))
-
-    return {
-        "message": message,
-        "current_player": current_player,
-        "current_player_obj": current_player_obj,
-        "current_cycle": current_cycle,
-        "plus_minus": plus_minus,
-        "scores_data": scores_data,
-        "scores_qs": scores_qs,
-        "round_complete": round_complete,
-        "error": None
-    }
+def get_game_state(game, progress):
+    # Served from the process-local RoundState cache; rebuilt only when game.version moved on
+    return get_round_state(game, progress.current_round, progress.team_first).as_dict()
 # --- End Optimized Helper Function ---
 @staff_member_required
 def start_game(request):
@@ -116,12 +47,7 @@ def start_game(request):
 
     if request.method == "POST" and form.is_valid():
         game = form.save()
-
-        # Initialize round-related session keys
-        request.session[f"game_{game.id}_current_round"] = 1
-        request.session.pop("round_team_first", None)
-        for i in range(1, 10):
-            request.session.pop(f"round_{i}_team_first", None)
+        GameProgress.objects.create(game=game)
 
         return redirect("live_game", game_id=game.id)
 
@@ -150,35 +76,16 @@ def live_game(request, game_id):
     Handles the live game interface, player selection, and AJAX score submission
     with robust error handling and specific validation feedback.
     """
-    game = get_object_or_404(Game, id=game_id)
-    current_round_session_key = f"game_{game_id}_current_round"
-    current_round = request.session.get(current_round_session_key, 1)
-    if not isinstance(current_round, int) or current_round < 1:
-        current_round = 1
-        request.session[current_round_session_key] = current_round
-
-    # --- Sync current round from DB (Simplified - review if needed) ---
-    try:
-        round_agg = Score.objects.filter(game=game).aggregate(max_score_round=db_models.Max("round_number"))
-        player_agg = GamePlayer.objects.filter(game=game).aggregate(max_player_round=db_models.Max("round_number"))
-        latest_db_round = max(round_agg["max_score_round"] or 0, player_agg["max_player_round"] or 0)
-        effective_latest_round = max(latest_db_round, game.game_players.aggregate(max_round=db_models.Max('round_number'))['max_round'] or 0)
-        db_current_round = effective_latest_round if effective_latest_round > 0 else 1
-
-        # Optional: Implement stricter sync logic if required
-        # if db_current_round != current_round:
-        #     logger.warning(f"Session/DB Round Mismatch: Session={current_round}, DB={db_current_round}")
-        #     # current_round = db_current_round # Force sync?
-        #     # request.session[current_round_session_key] = current_round
+    game = get_object_or_404(Game.objects.select_related("progress"), id=game_id)
+    progress = GameProgress.for_game(game)
+    current_round = progress.current_round
 
-    except Exception as e:
-        logger.error(f"Error during round sync for game {game_id}: {e}", exc_info=True)
-
-    logger.info(f"Accessing Live Game View - Game ID: {game_id}, Session Round: {current_round}")
+    logger.info(f"Accessing Live Game View - Game ID: {game_id}, Round: {current_round}")
 
     # --- Player Selection Logic ---
     try:
-        players_exist = game.game_players.filter(round_number=current_round, team="own").exists()
+        state = get_game_state(game, progress)
+        players_exist = state["round_state"].has_team("own")
     except Exception as e:
          logger.error(f"DB Error checking players for game {game_id}, round {current_round}: {e}", exc_info=True)
          return render(request, "scores/live_game.html", {"error": "Database error checking player setup.", "game": game, "current_round": current_round})
@@ -212,9 +119,9 @@ def live_game(request, game_id):
                                 opp_players_to_create.append(GamePlayer(game=game, player=opp_player, round_number=current_round, team="opp"))
                                 existing_opp_names.add(opp_name)
                         if opp_players_to_create: GamePlayer.objects.bulk_create(opp_players_to_create)
-
-                    request.session[f"round_{current_round}_team_first"] = round_options_form.cleaned_data["team_first_round"]
-                    request.session[current_round_session_key] = current_round
+                        progress.team_first = round_options_form.cleaned_data["team_first_round"]
+                        progress.save(update_fields=["team_first"])
+                        game_rows_changed(game.id, current_round) # bulk_create skips model signals
                     logger.info(f"Player selection successful for game {game_id}, round {current_round}.")
                     return redirect("live_game", game_id=game.id)
                 except Exception as e:
@@ -231,7 +138,7 @@ def live_game(request, game_id):
                  })
         else: # GET
             formset = GamePlayerFormSet(queryset=GamePlayer.objects.none(), prefix='player')
-            round_options_form = RoundOptionsForm(initial={'team_first_round': request.session.get(f"round_{current_round}_team_first", "own")})
+            round_options_form = RoundOptionsForm(initial={'team_first_round': progress.team_first})
             return render(request, "scores/select_players.html", {
                 "formset": formset, "round_options_form": round_options_form, "game": game, "current_round": current_round
             })
@@ -241,13 +148,9 @@ def live_game(request, game_id):
     # --- AJAX Score Submission ---
     if request.method == "POST" and request.headers.get('x-requested-with') == 'XMLHttpRequest':
         try: # Overall AJAX try block
-            # Get state
-            try:
-                state = get_game_state(game, current_round, request)
-                current_player_obj = state.get("current_player_obj") # Should be GamePlayer instance
-            except Exception as e:
-                 logger.error(f"AJAX Error getting game state: {e}", exc_info=True)
-                 return JsonResponse({"success": False, "error": "Could not determine game state."}, status=500)
+            # State was loaded above for the player check
+            round_state = state["round_state"]
+            current_player_obj = state.get("current_player_obj") # Should be GamePlayer instance
 
             # Check round complete
             if state.get("round_complete"):
@@ -266,26 +169,26 @@ def live_game(request, game_id):
             if score_form.is_valid():
                 # --- Save Valid Score ---
                 try:
-                    with transaction.atomic():
-                        score = score_form.save(commit=False)
-                        score.game = game
-                        score.player = current_player_obj.player
-                        score.round_number = current_round
-                        score.cycle_number = state.get("current_cycle", 1)
-                        score.total = (score_form.cleaned_data.get('roll1') or 0) + \
-                                      (score_form.cleaned_data.get('roll2') or 0) + \
-                                      (score_form.cleaned_data.get('roll3') or 0)
-                        score.save()
+                    data = score_form.cleaned_data
+                    try:
+                        round_state, (score,) = record_turns(
+                            game, current_round, round_state.team_first,
+                            [(data['roll1'], data['roll2'], data['roll3'])],
+                        )
+                    except TurnError as e:
+                        # Another device finished the round since this request loaded the state
+                        complete_url = reverse("round_complete", args=[game.id]) if e.round_complete else None
+                        return JsonResponse({"success": False, "error": e.message, "round_complete": e.round_complete, "current_round": current_round, "round_complete_url": complete_url}, status=e.status)
                     logger.info(f"Score saved: Game {game_id}, R{current_round}, C{score.cycle_number}, P{score.player.id}")
 
                     # --- Get New State & Return Success ---
-                    new_state = get_game_state(game, current_round, request)
+                    new_state = round_state.as_dict()
                     is_round_complete = new_state.get("round_complete", False)
                     completion_url = None
                     if is_round_complete:
                         try: completion_url = reverse("round_complete", args=[game.id])
                         except Exception: pass
-                    new_score_data = { 'id': score.id, 'player__name': score.player.name, 'cycle_number': score.cycle_number, 'roll1': score.roll1, 'roll2': score.roll2, 'roll3': score.roll3, 'total': score.total }
+                    new_score_data = score_payload(score)
 
                     # Return success payload, including the message from get_game_state (which should contain next player prompt)
                     return JsonResponse({
@@ -293,6 +196,7 @@ def live_game(request, game_id):
                         "message": new_state.get("message", "Score recorded."), # CRITICAL: Ensure this message includes the next player's turn
                         "plus_minus": new_state.get("plus_minus"),
                         "new_score": new_score_data,
+                        "next_turn": round_state.cursor,
                         "round_complete": is_round_complete,
                         "current_round": current_round,
                         "round_complete_url": completion_url
@@ -335,7 +239,6 @@ def live_game(request, game_id):
     else: # Not POST or not AJAX
         try:
             logger.info(f"Handling GET request for live_game {game_id}, round {current_round}")
-            state = get_game_state(game, current_round, request)
             score_form = ScoreForm()
             is_round_complete_get = state.get("round_complete", False)
             completion_url_get = None
@@ -345,9 +248,12 @@ def live_game(request, game_id):
 
             context = {
                 "game": game, "current_round": current_round, "score_form": score_form,
-                "message": state.get("message"), "scores": state.get("scores_qs"),
+                "message": state.get("message"), "scores": state.get("scores_data"),
                 "plus_minus": state.get("plus_minus"), "round_complete": is_round_complete_get,
-                "round_complete_url": completion_url_get, "error": state.get("error")
+                "round_complete_url": completion_url_get, "error": state.get("error"),
+                "next_turn": state["round_state"].cursor,
+                "live_seq": state["round_state"].version,  # The socket resumes from here (see scores/consumers.py)
+                "rules": RULES.as_json(),  # Emitted with json_script so the client can reject illegal turns
             }
             return render(request, "scores/live_game.html", context)
         except Exception as e:
@@ -355,17 +261,68 @@ def live_game(request, game_id):
              context = {"error": "Failed to load game data.", "game": game, "current_round": current_round}
              return render(request, "scores/live_game.html", context) # Render same template with error
 
+@require_POST
+@staff_member_required
+def ajax_submit_score_batch(request, game_id):
+    """
+    Accepts an ordered list of turns for the round in play, e.g. a whole cycle typed in
+    one go or a queue replayed after losing signal:
+        {"turns": [{"roll1": 3, "roll2": 4, "roll3": 0}, ...], "start_turn": 12}
+    Every turn is validated before anything is saved; players and cycles are assigned
+    from the scoring order and the scores go in with a single bulk_create.
+    """
+    game = get_object_or_404(Game.objects.select_related("progress"), id=game_id)
+    progress = GameProgress.for_game(game)
+    current_round = progress.current_round
+
+    try:
+        payload = json.loads(request.body or b"{}")
+        turns = payload["turns"]
+        start_turn = payload.get("start_turn")
+        if not isinstance(turns, list) or not turns:
+            raise ValueError("turns must be a non-empty list")
+        if start_turn is not None:
+            start_turn = int(start_turn)
+    except (ValueError, TypeError, KeyError) as e:
+        return JsonResponse({"success": False, "error": f"Invalid batch payload: {e}"}, status=400)
+
+    rolls, errors = validate_turns(turns)
+    if errors:
+        logger.warning(f"Batch validation failed: Game {game_id}, R{current_round}, Errors: {errors}")
+        return JsonResponse({"success": False, "error": "Validation failed.", "errors": errors}, status=400)
+
+    state = get_game_state(game, progress)
+    try:
+        round_state, scores = record_turns(game, current_round, state["round_state"].team_first, rolls, start_turn=start_turn)
+    except TurnError as e:
+        return JsonResponse({"success": False, "error": e.message, "round_complete": e.round_complete, "next_turn": state["round_state"].cursor}, status=e.status)
+    logger.info(f"Batch saved: Game {game_id}, R{current_round}, {len(scores)} turn(s)")
+
+    new_state = round_state.as_dict()
+    return JsonResponse({
+        "success": True,
+        "message": new_state["message"],
+        "plus_minus": new_state["plus_minus"],
+        "new_scores": [score_payload(score) for score in scores],
+        "next_turn": round_state.cursor,
+        "round_complete": new_state["round_complete"],
+        "current_round": current_round,
+        "round_complete_url": reverse("round_complete", args=[game.id]) if new_state["round_complete"] else None,
+    })
+
 @staff_member_required
 def round_complete(request, game_id):
-    game = get_object_or_404(Game, id=game_id)
-    session_key = f"game_{game_id}_current_round"
-    completed_round = request.session.get(session_key, 1)
+    game = get_object_or_404(Game.objects.select_related("progress"), id=game_id)
+    progress = GameProgress.for_game(game)
+    completed_round = progress.current_round
 
     if request.method == "POST":
         if "next_round" in request.POST:
             next_round = completed_round + 1
-            request.session[session_key] = next_round
-            request.session.pop(f"round_{next_round}_team_first", None)
+            # Guarded on the round so a second device pressing the button doesn't skip a round
+            GameProgress.objects.filter(game=game, current_round=completed_round).update(
+                current_round=next_round, team_first="own"
+            )
             print(f"Advancing game {game_id} to round {next_round}")
             return redirect("live_game", game_id=game.id)
 
@@ -394,129 +351,44 @@ def add_player(request):
 
 
 
-# --- Game Statistics View (Unchanged from your provided code) ---
-from django.db.models import Prefetch
-
-def game_statistics(request, game_id):
-    game = get_object_or_404(Game, id=game_id)
+# --- Game Statistics View ---
 
-    scores_qs = Score.objects.filter(game=game)
+# The read-only stats views below are async: under ASGI they wait on the database
+# without holding a worker thread of their own. The async ORM (aget, acount,
+# async for) and the sync helpers they call (caches, aggregates) still run
+# through sync_to_async's thread-sensitive executor, which Django's ASGI
+# handler gives each request to itself; so asyncio.gather overlaps the
+# awaits but one request's queries still go one at a time on its own
+# connection. Rendering goes through sync_to_async too, since templates can
+# touch lazy relations and request.user.
 
-    # Preload GamePlayer once to avoid repeated queries
-    game_players = GamePlayer.objects.filter(game=game).select_related("player")
-    own_ids = set(p.player_id for p in game_players if p.team == "own")
-    opp_ids = set(p.player_id for p in game_players if p.team == "opp")
+async def _alist(queryset):
+    return [obj async for obj in queryset]
 
-    # Precompute player score totals
-    all_player_totals = scores_qs.values("player__id", "player__name") \
-        .annotate(player_total=Coalesce(Sum("total"), 0)) \
-        .order_by("player__name")
 
-    own_totals_dict = {p["player__id"]: p for p in all_player_totals if p["player__id"] in own_ids}
-    opp_totals_dict = {p["player__id"]: p for p in all_player_totals if p["player__id"] in opp_ids}
-
-    # Totals
-    own_total = sum(p["player_total"] for p in own_totals_dict.values())
-    opp_total = sum(p["player_total"] for p in opp_totals_dict.values())
+async def _apage(queryset, per_page, number):
+    """paginator.page(number) (or page 1 if that is invalid), with the count and rows fetched by the async ORM."""
+    paginator = Paginator(queryset, per_page)
+    paginator.count = await queryset.acount()  # cached_property, so the sync count() never runs
+    try:
+        page = paginator.page(number)
+    except (PageNotAnInteger, EmptyPage):
+        page = paginator.page(1)
+    page.object_list = await _alist(page.object_list)
+    return page
 
-    # Result
-    if own_total > opp_total:
-        overall_result = {"result": "Win", "color": "green"}
-    elif own_total < opp_total:
-        overall_result = {"result": "Loss", "color": "red"}
-    else:
-        overall_result = {"result": "Draw", "color": "gray"}
-
-    # Round & cycle totals
-    round_totals = scores_qs.values("round_number").annotate(round_total=Sum("total")).order_by("round_number")
-    cycle_totals = scores_qs.values("cycle_number").annotate(cycle_total=Sum("total")).order_by("cycle_number")
-
-    # Player stats
-    player_stats = scores_qs.values("player__id", "player__name") \
-        .annotate(
-            total_score=Coalesce(Sum("total"), 0),
-            num_cycles=Count("id")
-        ) \
-        .annotate(
-            average=Case(
-                When(num_cycles=0, then=Value(0.0)),
-                default=ExpressionWrapper(
-                    F("total_score") * 1.0 / F("num_cycles"),
-                    output_field=FloatField()
-                ),
-                output_field=FloatField()
-            )
-        ) \
-        .order_by("-total_score")
-
-    highest_total = max((p["total_score"] for p in player_stats), default=0)
-    highest_scorers = [p["player__id"] for p in player_stats if p["total_score"] == highest_total]
-
-    # Match own/opp players by name
-    zipped_totals = []
-    processed_opp_ids = set()
-
-    for own_id, own_data in own_totals_dict.items():
-        own_name = own_data["player__name"]
-        expected_opp_name = f"Opp. {own_name}"
-        matched_opp = next((v for k, v in opp_totals_dict.items() if v["player__name"] == expected_opp_name), None)
-        if matched_opp:
-            processed_opp_ids.add(matched_opp["player__id"])
-        zipped_totals.append({"own": own_data, "opp": matched_opp})
-
-    # Unmatched opponents
-    for opp_id, opp_data in opp_totals_dict.items():
-        if opp_id not in processed_opp_ids:
-            zipped_totals.append({"own": None, "opp": opp_data})
-
-    # Round differentials
-    round_diffs = []
-    max_round = scores_qs.aggregate(Max("round_number"))["round_number__max"] or 0
-
-    # Prefetch GamePlayers for all rounds
-    round_gameplayers = GamePlayer.objects.filter(game=game).values("player_id", "team", "round_number")
-    gameplayer_map = {}
-    for entry in round_gameplayers:
-        key = (entry["round_number"], entry["team"])
-        gameplayer_map.setdefault(key, []).append(entry["player_id"])
-
-    for r in range(1, max_round + 1):
-        own_ids_r = gameplayer_map.get((r, "own"), [])
-        opp_ids_r = gameplayer_map.get((r, "opp"), [])
-
-        own_total_r = scores_qs.filter(round_number=r, player__in=own_ids_r).aggregate(
-            total=Coalesce(Sum("total"), 0)
-        )["total"]
-        opp_total_r = scores_qs.filter(round_number=r, player__in=opp_ids_r).aggregate(
-            total=Coalesce(Sum("total"), 0)
-        )["total"]
-
-        round_diffs.append({
-            "round_number": r,
-            "own_total": own_total_r,
-            "opp_total": opp_total_r,
-            "differential": own_total_r - opp_total_r
-        })
 
-    context = {
-        "game": game,
-        "cycle_totals": cycle_totals,
-        "round_totals": round_totals,
-        "own_total": own_total,
-        "opp_total": opp_total,
-        "overall_result": overall_result,
-        "player_stats": player_stats,
-        "highest_scorers": highest_scorers,
-        "round_diffs": round_diffs,
-        "zipped_totals": zipped_totals,
-    }
-    return render(request, "scores/game_stats.html", context)
+async def game_statistics(request, game_id):
+    game = await aget_object_or_404(Game.objects.select_related("opponent", "location", "game_type"), id=game_id)
+    # One grouped query on a cache miss; cached per Game.version, so finished games cost no aggregates
+    context = {"game": game, **await sync_to_async(get_game_stats)(game)}
+    return await sync_to_async(render)(request, "scores/game_stats.html", context)
 
 GAMES_PER_PAGE = 5
 # --- Past Games View (Minor adjustment for clarity) ---
 from django.template.loader import render_to_string  # Add this import at the top of your file
 
-def past_games(request):
+async def past_games(request):
     try:
         opponent_id = int(request.GET.get('opponent', '').strip())
     except (ValueError, TypeError):
@@ -529,51 +401,37 @@ def past_games(request):
 
     result_filter = request.GET.get('result', '').strip()
 
-    game_list = Game.objects.select_related('opponent', 'location').order_by("-date", "-id")
+    # Totals and result are computed in SQL so the result filter runs before pagination
+    game_list = annotate_game_results(
+        Game.objects.select_related('opponent', 'location', 'game_type')
+    ).order_by("-date", "-id")
     if opponent_id:
         game_list = game_list.filter(opponent_id=opponent_id)
     if location_id:
         game_list = game_list.filter(location_id=location_id)
+    if result_filter in ["Win", "Loss", "Draw"]:
+        game_list = game_list.filter(result=result_filter)
 
-    paginator = Paginator(game_list, GAMES_PER_PAGE)
-    page_number = request.GET.get("page", 1)
-
-    try:
-        page_obj = paginator.page(page_number)
-    except (PageNotAnInteger, EmptyPage):
-        page_obj = paginator.page(1)
-
-    # Preload all GamePlayer and Score data for games on current page
-    game_ids = [g.id for g in page_obj.object_list]
-    all_players = GamePlayer.objects.filter(game_id__in=game_ids).values('game_id', 'team', 'player_id')
-    all_scores = Score.objects.filter(game_id__in=game_ids).values('game_id', 'player_id')
-
-    scores_by_game_team = {}
-    for score in all_scores:
-        game_id = score['game_id']
-        player_id = score['player_id']
-        if game_id not in scores_by_game_team:
-            scores_by_game_team[game_id] = {'own': set(), 'opp': set()}
-        for player in all_players:
-            if player['game_id'] == game_id and player['player_id'] == player_id:
-                scores_by_game_team[game_id][player['team']].add(player_id)
-
-    past_games_data = []
-    for game in page_obj.object_list:
-        own_ids = scores_by_game_team.get(game.id, {}).get('own', set())
-        opp_ids = scores_by_game_team.get(game.id, {}).get('opp', set())
-        own_total = Score.objects.filter(game=game, player_id__in=own_ids).aggregate(total=Coalesce(Sum("total"), 0))["total"]
-        opp_total = Score.objects.filter(game=game, player_id__in=opp_ids).aggregate(total=Coalesce(Sum("total"), 0))["total"]
-        result = "Win" if own_total > opp_total else "Loss" if own_total < opp_total else "Draw"
-        past_games_data.append({"game": game, "own_total": own_total, "opp_total": opp_total, "result": result})
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    if is_ajax:
+        page_obj = await _apage(game_list, GAMES_PER_PAGE, request.GET.get("page", 1))
+    else:
+        # The filter dropdowns don't depend on the page, so fetch them alongside it
+        page_obj, all_opponents, all_locations = await asyncio.gather(
+            _apage(game_list, GAMES_PER_PAGE, request.GET.get("page", 1)),
+            _alist(Opponent.objects.all()),
+            _alist(Location.objects.all()),
+        )
 
-    if result_filter in ["Win", "Loss", "Draw"]:
-        past_games_data = [g for g in past_games_data if g["result"] == result_filter]
+    past_games_data = [
+        {"game": game, "own_total": game.own_total, "opp_total": game.opp_total, "result": game.result}
+        for game in page_obj.object_list
+    ]
 
-    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+    if is_ajax:
         try:
-            html = render_to_string('scores/_past_games_table_rows.html', {'past_games': past_games_data, 'user': request.user})
-            pagination_html = render_to_string('scores/_pagination_controls.html', {'page_obj': page_obj})
+            html = await sync_to_async(render_to_string)('scores/_past_games_table_rows.html', {'past_games': past_games_data, 'user': request.user})
+            pagination_html = await sync_to_async(render_to_string)('scores/_pagination_controls.html', {'page_obj': page_obj})
             return JsonResponse({'html': html, 'pagination_html': pagination_html, 'current_page': page_obj.number})
         except Exception as e:
             import traceback
@@ -583,15 +441,50 @@ def past_games(request):
     context = {
         "past_games": past_games_data,
         "page_obj": page_obj,
-        "all_opponents": Opponent.objects.all(),
-        "all_locations": Location.objects.all(),
+        "all_opponents": all_opponents,
+        "all_locations": all_locations,
         "active_filters": {
             "opponent": str(opponent_id) if opponent_id else '',
             "location": str(location_id) if location_id else '',
             "result": result_filter,
         }
     }
-    return render(request, "scores/past_games.html", context)
+    return await sync_to_async(render)(request, "scores/past_games.html", context)
+
+def past_games_feed(request):
+    """
+    JSON feed of past games for client-side rendering / infinite scroll: keyset-paginated
+    on (-date, -id) via ?cursor, ?limit games per page, same filters as past_games.
+    """
+    try:
+        opponent_id = int(request.GET.get('opponent', '').strip() or 0) or None
+        location_id = int(request.GET.get('location', '').strip() or 0) or None
+        limit = int(request.GET.get('limit', DEFAULT_FEED_SIZE))
+        page = games_feed_page(
+            cursor=request.GET.get('cursor') or None,
+            limit=limit,
+            opponent_id=opponent_id,
+            location_id=location_id,
+            result=request.GET.get('result', '').strip() or None,
+        )
+    except (InvalidCursor, ValueError):
+        return JsonResponse({'error': 'Invalid cursor, filter or limit'}, status=400)
+
+    games = [
+        {
+            'id': game.id,
+            'date': game.date.isoformat(),
+            'opponent': game.opponent.name if game.opponent else None,
+            'location': game.location.name if game.location else None,
+            'game_type': game.game_type.name if game.game_type else None,
+            'own_total': game.own_total,
+            'opp_total': game.opp_total,
+            'result': game.result,
+            'statistics_url': reverse('game_statistics', args=[game.id]),
+        }
+        for game in page['games']
+    ]
+    return JsonResponse({'games': games, 'next_cursor': page['next_cursor'], 'has_next': page['next_cursor'] is not None})
 
 @require_POST
 @staff_member_required
@@ -601,6 +494,7 @@ def delete_game(request, game_id):
 
     try:
         game.delete()
+        forget_game(game_id)
         response_data = {'status': 'success', 'message': 'Game deleted successfully'}
         status_code = 200
     except Exception as e:
@@ -623,48 +517,29 @@ GAMES_PER_PAGE = 5 # Define how many games per page
 
 # --- Helper Function ---
 def _get_player_improvement_data(player_id):
-    """Helper function to get the raw improvement data query, ordered for the table."""
-    player_scores = Score.objects.filter(player_id=player_id)
-    return list(
-        player_scores.values(
-            'game__id', 'game__date',
-            'game__opponent__name', 'game__location__name'
-        )
-        .annotate(game_avg=Avg('total'))
-        .order_by('-game__date') # Order by most recent first for table display
-    )
+    """Per-game averages for the player, most recent first (from the cached analytics)."""
+    analytics = get_player_analytics(player_id)
+    return analytics["games"][::-1] if analytics else []
 
 # --- Main Statistics View ---
-def player_statistics(request):
-    players = Player.objects.exclude(name__startswith="Opp.").order_by("name")
+async def player_statistics(request):
     selected_player = None
     stats = {}
     chart_data_json = None
     game_history_page = None
     paginator = None
     top_players_chart_json = None
+    history_next_cursor = None
 
     player_id = request.GET.get('player_id')
 
-    # --- Top 5 Own Team Players Chart --- 
-    # Get scores where players were specifically on the 'own' team
-    top_players_data = (
-        Score.objects
-        .filter(
-            # This exists clause ensures each score has a matching GamePlayer
-            # record with the same game_id and player_id and team='own'
-            Exists(
-                GamePlayer.objects.filter(
-                    game_id=OuterRef('game_id'),
-                    player_id=OuterRef('player_id'),
-                    team='own'
-                )
-            )
-        )
-        .values('player__id', 'player__name')
-        .annotate(total_score=Coalesce(Sum('total'), 0))
-        .order_by('-total_score')[:5]
+    # --- Top 5 Own Team Players Chart ---
+    # All-time leaderboard, cached until a score in any game changes (scores/leaderboards.py)
+    players, leaderboards = await asyncio.gather(
+        _alist(Player.objects.exclude(name__startswith="Opp.").order_by("name")),
+        sync_to_async(get_leaderboards)(limit=5),
     )
+    top_players_data = leaderboards["by_total"]
 
     top_players_chart_data = {
         'labels': [p['player__name'] for p in top_players_data],
@@ -673,73 +548,47 @@ def player_statistics(request):
     top_players_chart_json = json.dumps(top_players_chart_data)
 
     if player_id:
+        # An unknown (or non-numeric) id is a 404, not an empty stats page
+        if not player_id.isdigit():
+            raise Http404("No Player matches the given query.")
+        selected_player = await aget_object_or_404(Player, id=player_id)
         try:
-            selected_player = get_object_or_404(Player, id=player_id)
-            player_scores = Score.objects.filter(player=selected_player)
-            player_games = GamePlayer.objects.filter(player=selected_player)
-
-            if player_scores.exists():
-                total_score_agg = player_scores.aggregate(total_score=Coalesce(Sum('total'), 0))
-                stats['total_score'] = total_score_agg['total_score']
-                stats['total_cycles'] = player_scores.count()
-
-                rolls_agg = player_scores.aggregate(
-                    r1=Count('roll1'),
-                    r2=Count('roll2'),
-                    r3=Count('roll3')
-                )
-                stats['total_rolls'] = rolls_agg['r1'] + rolls_agg['r2'] + rolls_agg['r3']
-
-                stats['avg_per_cycle'] = (
-                    stats['total_score'] / stats['total_cycles']
-                    if stats['total_cycles'] > 0 else 0
-                )
-                stats['avg_per_roll'] = (
-                    stats['total_score'] / stats['total_rolls']
-                    if stats['total_rolls'] > 0 else 0
-                )
-
-                stats['zero_cycle_count'] = player_scores.filter(total=0).count()
-
-                zero_rolls_agg = player_scores.aggregate(
-                    z1=Count('id', filter=Q(roll1=0)),
-                    z2=Count('id', filter=Q(roll2=0)),
-                    z3=Count('id', filter=Q(roll3=0))
-                )
-                stats['total_zero_rolls'] = (
-                    zero_rolls_agg['z1'] + zero_rolls_agg['z2'] + zero_rolls_agg['z3']
-                )
+            # Career figures are maintained incrementally (scores/careers.py): one row, however long the history.
+            # Distribution, spread and form come from one fetch of the player's turns (scores/analytics.py)
+            career, analytics = await asyncio.gather(
+                PlayerCareer.objects.filter(player=selected_player).afirst(),
+                sync_to_async(get_player_analytics)(selected_player.id),
+            )
+            career = career or PlayerCareer(player=selected_player)
+
+            if career.cycles:
+                stats['total_score'] = career.total_score
+                stats['total_cycles'] = career.cycles
+                stats['total_rolls'] = career.rolls
+                stats['avg_per_cycle'] = career.total_score / career.cycles
+                stats['avg_per_roll'] = career.total_score / career.rolls if career.rolls > 0 else 0
+                stats['zero_cycle_count'] = career.zero_cycles
+                stats['total_zero_rolls'] = career.zero_rolls
                 stats['zero_roll_percentage'] = (
-                    stats['total_zero_rolls'] / stats['total_rolls'] * 100
-                    if stats['total_rolls'] > 0 else 0
-                )
-
-                stats['highest_cycle_score'] = player_scores.aggregate(max_c=Max('total'))['max_c']
-
-                roll_max = player_scores.aggregate(
-                    max_r1=Max('roll1'),
-                    max_r2=Max('roll2'),
-                    max_r3=Max('roll3')
-                )
-                stats['highest_roll_score'] = max(
-                    roll_max.get('max_r1') or 0,
-                    roll_max.get('max_r2') or 0,
-                    roll_max.get('max_r3') or 0
+                    career.zero_rolls / career.rolls * 100 if career.rolls > 0 else 0
                 )
+                stats['highest_cycle_score'] = career.highest_cycle_score
+                stats['highest_roll_score'] = career.highest_roll_score or 0
 
-                improvement_data_qs = _get_player_improvement_data(selected_player.id)
-
-                if improvement_data_qs:
-                    chart_data_list = sorted(
-                        improvement_data_qs,
-                        key=lambda x: x['game__date'] if x.get('game__date') else date.min
-                    )
+                improvement_data_qs = analytics["games"][::-1] if analytics else []
 
+                if analytics:
+                    games = analytics["games"]
+                    window = analytics["form_window"]
                     chart_data = {
-                        'labels': [item['game__date'].strftime('%Y-%m-%d') for item in chart_data_list if item.get('game__date')],
-                        'data': [float(item['game_avg']) for item in chart_data_list if item.get('game_avg') is not None]
+                        'labels': [item['game__date'].strftime('%Y-%m-%d') for item in games],
+                        'data': [item['game_avg'] for item in games],
+                        # Rolling average is defined from the window-th game on
+                        'rolling': [None] * (window - 1) + analytics['rolling_avgs'] if analytics['rolling_avgs'] else [],
+                        'rolling_window': window,
                     }
                     chart_data_json = json.dumps(chart_data)
+                    stats['analytics'] = analytics
 
                 if improvement_data_qs:
                     paginator = Paginator(improvement_data_qs, GAMES_PER_PAGE)
@@ -747,55 +596,16 @@ def player_statistics(request):
                         game_history_page = paginator.page(1)
                     except (EmptyPage, PageNotAnInteger):
                         game_history_page = paginator.page(1) if paginator.num_pages >= 1 else paginator.page(paginator.num_pages)
+                    # Further pages come from the keyset endpoint, starting after the last row shown
+                    if game_history_page.has_next():
+                        last = game_history_page.object_list[-1]
+                        history_next_cursor = encode_cursor(last['game__date'], last['game__id'])
+
+            stats['games_participated'] = career.games_participated
+            stats['wins'] = career.wins
+            stats['losses'] = career.losses
+            stats['draws'] = career.draws
 
-            distinct_game_ids = list(player_games.values_list('game_id', flat=True).distinct())
-            stats['games_participated'] = len(distinct_game_ids)
-            stats['wins'] = 0
-            stats['losses'] = 0
-            stats['draws'] = 0
-
-            if distinct_game_ids:
-                all_games_data = {
-                    g.id: g for g in Game.objects.filter(id__in=distinct_game_ids)
-                }
-                all_gameplayers = GamePlayer.objects.filter(game_id__in=distinct_game_ids)
-                game_team_map = {'own': {}, 'opp': {}}
-                for gp in all_gameplayers:
-                    game_team_map.setdefault(gp.team, {}).setdefault(gp.game_id, set()).add(gp.player_id)
-
-                score_totals = Score.objects.filter(game_id__in=distinct_game_ids) \
-                    .values('game_id', 'player_id') \
-                    .annotate(total=Coalesce(Sum('total'), 0))
-
-                game_team_totals = {gid: {'own': 0, 'opp': 0} for gid in distinct_game_ids}
-                for s in score_totals:
-                    gid = s['game_id']
-                    pid = s['player_id']
-                    total = s['total']
-                    if pid in game_team_map.get('own', {}).get(gid, set()):
-                        game_team_totals[gid]['own'] += total
-                    elif pid in game_team_map.get('opp', {}).get(gid, set()):
-                        game_team_totals[gid]['opp'] += total
-
-                for g_id in distinct_game_ids:
-                    game_obj = all_games_data.get(g_id)
-                    if not game_obj:
-                        continue
-
-                    is_own_team_player = selected_player.id in game_team_map.get('own', {}).get(g_id, set())
-
-                    if is_own_team_player:
-                        own_total = game_team_totals[g_id]['own']
-                        opp_total = game_team_totals[g_id]['opp']
-                        if own_total > opp_total:
-                            stats['wins'] += 1
-                        elif own_total < opp_total:
-                            stats['losses'] += 1
-                        else:
-                            stats['draws'] += 1
-
-        except Player.DoesNotExist:
-            selected_player = None
         except Exception as e:
             print(f"Error calculating stats for player {player_id}: {e}")
             pass
@@ -807,12 +617,32 @@ def player_statistics(request):
         'chart_data_json': chart_data_json,
         'game_history_page': game_history_page,
         'paginator': paginator,
+        'history_next_cursor': history_next_cursor,
         'player_id': player_id,
         'top_players_chart_json': top_players_chart_json,
     }
-    return render(request, 'scores/player_statistics.html', context)
+    return await sync_to_async(render)(request, 'scores/player_statistics.html', context)
+def _history_game_json(request, game_stat):
+    """One game-history row as the history table's JS expects it."""
+    # Convert date to string, handle None values gracefully
+    game_date_str = game_stat['game__date'].strftime('%Y-%m-%d') if game_stat.get('game__date') else 'N/A'
+    # Generate the detail URL safely
+    try:
+         game_url = request.build_absolute_uri(reverse('game_statistics', args=[game_stat['game__id']]))
+    except Exception: # Handle cases where reverse fails (e.g., URL pattern not found)
+         game_url = '#' # Fallback URL
+
+    return {
+        'game_id': game_stat['game__id'],
+        'date': game_date_str,
+        'opponent_name': game_stat.get('game__opponent__name') or 'N/A',
+        'location_name': game_stat.get('game__location__name') or 'N/A',
+        'game_avg': float(game_stat['game_avg']) if game_stat.get('game_avg') is not None else 0.0, # Ensure float
+        'game_url': game_url
+    }
+
 # --- AJAX View for Game History Pagination ---
-def player_game_history_page(request, player_id, page_num):
+async def player_game_history_page(request, player_id, page_num):
     """
     Returns JSON data for a specific page of a player's game history.
     """
@@ -822,33 +652,16 @@ def player_game_history_page(request, player_id, page_num):
 
     try:
         # Ensure player exists (or return 404 handled by get_object_or_404)
-        player = get_object_or_404(Player, id=player_id)
+        player = await aget_object_or_404(Player, id=player_id)
 
         # Get the same base data as in the main view
-        improvement_data_qs = _get_player_improvement_data(player.id)
+        improvement_data_qs = await sync_to_async(_get_player_improvement_data)(player.id)
         paginator = Paginator(improvement_data_qs, GAMES_PER_PAGE)
 
         page_obj = paginator.get_page(page_num) # Handles invalid page numbers gracefully
 
         # Prepare data for JSON serialization
-        game_data = []
-        for game_stat in page_obj.object_list:
-            # Convert date to string, handle None values gracefully
-            game_date_str = game_stat['game__date'].strftime('%Y-%m-%d') if game_stat.get('game__date') else 'N/A'
-            # Generate the detail URL safely
-            try:
-                 game_url = request.build_absolute_uri(reverse('game_statistics', args=[game_stat['game__id']]))
-            except Exception: # Handle cases where reverse fails (e.g., URL pattern not found)
-                 game_url = '#' # Fallback URL
-
-            game_data.append({
-                'game_id': game_stat['game__id'],
-                'date': game_date_str,
-                'opponent_name': game_stat.get('game__opponent__name') or 'N/A',
-                'location_name': game_stat.get('game__location__name') or 'N/A',
-                'game_avg': float(game_stat['game_avg']) if game_stat.get('game_avg') is not None else 0.0, # Ensure float
-                'game_url': game_url
-            })
+        game_data = [_history_game_json(request, game_stat) for game_stat in page_obj.object_list]
 
         return JsonResponse({
             'games': game_data,
@@ -865,6 +678,65 @@ def player_game_history_page(request, player_id, page_num):
         print(f"Error fetching game history page (Player: {player_id}, Page: {page_num}): {e}")
         return JsonResponse({'error': 'An internal server error occurred while fetching game data.'}, status=500)
 
+# --- AJAX View for Game History, keyset-paginated ---
+async def player_game_history(request, player_id):
+    """
+    A page of the player's game history after (or, with ?direction=prev, before)
+    ?cursor, newest first. Costs the same for the hundredth page as for the first.
+    """
+    if not request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'error': 'Invalid request type'}, status=400)
+
+    try:
+        limit = int(request.GET.get('limit', GAMES_PER_PAGE))
+        # The page doesn't depend on the player row, so look both up at once
+        player, page = await asyncio.gather(
+            aget_object_or_404(Player, id=player_id),
+            sync_to_async(player_history_page)(
+                player_id,
+                cursor=request.GET.get('cursor') or None,
+                direction=request.GET.get('direction', 'next'),
+                limit=limit,
+            ),
+        )
+    except (InvalidCursor, ValueError):
+        return JsonResponse({'error': 'Invalid cursor or limit'}, status=400)
+
+    return JsonResponse({
+        'games': [_history_game_json(request, game_stat) for game_stat in page['games']],
+        'next_cursor': page['next_cursor'],
+        'prev_cursor': page['prev_cursor'],
+        'has_next': page['next_cursor'] is not None,
+        'has_previous': page['prev_cursor'] is not None,
+    })
+
+# --- Score Export (streamed) ---
+@staff_member_required
+def export_scores(request):
+    """
+    Every turn as CSV (default) or ?format=ndjson, streamed in keyset chunks so worker
+    memory stays flat. The body is an async iterator, so the ASGI handler sends each
+    chunk as it is read rather than buffering the export. Filters: ?date_from,
+    ?date_to (YYYY-MM-DD), ?opponent, ?player.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': 'format must be csv or ndjson'}, status=400)
+    try:
+        filters = {
+            'date_from': date.fromisoformat(request.GET['date_from']) if request.GET.get('date_from') else None,
+            'date_to': date.fromisoformat(request.GET['date_to']) if request.GET.get('date_to') else None,
+            'opponent_id': int(request.GET['opponent']) if request.GET.get('opponent') else None,
+            'player_id': int(request.GET['player']) if request.GET.get('player') else None,
+        }
+    except ValueError:
+        return JsonResponse({'error': 'Invalid date or id filter'}, status=400)
+
+    write_lines, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(aexport_text(write_lines, filtered_scores(**filters)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="scores.{export_format}"'
+    return response
+
 @require_POST # Ensures this view only accepts POST requests
 @staff_member_required # Or login_required, depending on your auth needs
 def ajax_add_opponent(request):
@@ -933,10 +805,12 @@ def ajax_add_location(request):
 
 
 # --- opponent_statistics (SINGLE CORRECT VERSION) ---
-def opponent_statistics(request):
+async def opponent_statistics(request):
     # Data for dropdowns
-    opponents = Opponent.objects.all().order_by('name')
-    game_types = GameType.objects.all().order_by('name') # Ensure GameType is imported
+    opponents, game_types = await asyncio.gather(
+        _alist(Opponent.objects.all().order_by('name')),
+        _alist(GameType.objects.all().order_by('name')),
+    )
 
     # Selected filter values
     selected_opponent = None
@@ -949,73 +823,68 @@ def opponent_statistics(request):
     chart_data_json = None
 
     if opponent_id:
-        try:
-            selected_opponent = get_object_or_404(Opponent, id=opponent_id)
-            games_query = Game.objects.filter(opponent=selected_opponent)
-
-            if game_type_id:
-                try:
-                    selected_game_type = GameType.objects.get(id=game_type_id)
-                    games_query = games_query.filter(game_type=selected_game_type)
-                except (GameType.DoesNotExist, ValueError, TypeError):
-                    selected_game_type = None; game_type_id = None
-
-            games_vs_opponent = games_query.order_by('date').select_related('location', 'game_type')
-            game_ids = list(games_vs_opponent.values_list('id', flat=True))
-
-            if not game_ids:
-                stats['error'] = "No games found matching the selected criteria."
-            else:
-                stats['total_games'] = len(game_ids)
-                all_scores_in_games = Score.objects.filter(game_id__in=game_ids).select_related('player')
-                all_game_players = GamePlayer.objects.filter(game_id__in=game_ids).select_related('player')
-                game_results = []; own_total_score_all_games = 0; opp_total_score_all_games = 0; wins = 0; losses = 0; draws = 0; score_diffs_by_date = []; scores_by_location = {}
-
-                for game in games_vs_opponent:
-                    own_ids_game = list(all_game_players.filter(game=game, team='own').values_list('player_id', flat=True))
-                    opp_ids_game = list(all_game_players.filter(game=game, team='opp').values_list('player_id', flat=True))
-                    own_total_game = all_scores_in_games.filter(game=game, player_id__in=own_ids_game).aggregate(total=Coalesce(Sum('total'), 0))['total']
-                    opp_total_game = all_scores_in_games.filter(game=game, player_id__in=opp_ids_game).aggregate(total=Coalesce(Sum('total'), 0))['total']
-                    own_total_score_all_games += own_total_game; opp_total_score_all_games += opp_total_game
-                    score_diff = own_total_game - opp_total_game
-                    result = "Draw";
-                    if score_diff > 0: wins += 1; result = "Win"
-                    elif score_diff < 0: losses += 1; result = "Loss"
-                    else: draws += 1
-                    game_results.append({'game': game, 'own_score': own_total_game, 'opp_score': opp_total_game, 'diff': score_diff, 'result': result})
-                    score_diffs_by_date.append({'date': game.date, 'diff': score_diff})
-                    loc_name = game.location.name if game.location else "Unknown Location";
-                    if loc_name not in scores_by_location: scores_by_location[loc_name] = {'wins': 0, 'losses': 0, 'draws': 0, 'diff_sum': 0, 'count': 0}
-                    scores_by_location[loc_name]['count'] += 1; scores_by_location[loc_name]['diff_sum'] += score_diff
-                    if result == "Win": scores_by_location[loc_name]['wins'] += 1
-                    elif result == "Loss": scores_by_location[loc_name]['losses'] += 1
-                    else: scores_by_location[loc_name]['draws'] += 1
-
-                stats['wins'] = wins; stats['losses'] = losses; stats['draws'] = draws
-                stats['win_percentage'] = (wins / stats['total_games'] * 100) if stats['total_games'] > 0 else 0
-                stats['avg_score_for'] = (own_total_score_all_games / stats['total_games']) if stats['total_games'] > 0 else 0
-                stats['avg_score_against'] = (opp_total_score_all_games / stats['total_games']) if stats['total_games'] > 0 else 0
-                stats['avg_score_diff'] = stats['avg_score_for'] - stats['avg_score_against']
-                game_scores_for = [g['own_score'] for g in game_results]; game_scores_against = [g['opp_score'] for g in game_results]
-                stats['highest_score_for'] = max(game_scores_for) if game_scores_for else 0; stats['lowest_score_for'] = min(game_scores_for) if game_scores_for else 0
-                stats['highest_score_against'] = max(game_scores_against) if game_scores_against else 0; stats['lowest_score_against'] = min(game_scores_against) if game_scores_against else 0
-
-                if score_diffs_by_date: chart_data = {'labels': [item['date'].strftime('%Y-%m-%d') for item in score_diffs_by_date], 'data': [item['diff'] for item in score_diffs_by_date]}; chart_data_json = json.dumps(chart_data)
-
-                location_stats = [];
-                for loc_name, data in sorted(scores_by_location.items()): avg_diff_loc = (data['diff_sum'] / data['count']) if data['count'] > 0 else 0; location_stats.append({'name': loc_name, 'wins': data['wins'], 'losses': data['losses'], 'draws': data['draws'], 'count': data['count'], 'avg_diff': avg_diff_loc})
-                stats['location_stats'] = location_stats
-
-                own_player_ids_in_games = all_game_players.filter(game_id__in=game_ids, team='own').values_list('player_id', flat=True).distinct()
-                top_players = list(all_scores_in_games.filter(game_id__in=game_ids, player_id__in=own_player_ids_in_games).values('player__name').annotate(total_score_vs_opp=Coalesce(Sum('total'), 0), cycle_count_vs_opp=Count('id')).annotate(avg_score_vs_opp=ExpressionWrapper( Case(When(cycle_count_vs_opp=0, then=Value(0.0)), default=F('total_score_vs_opp') * 1.0 / F('cycle_count_vs_opp')), output_field=FloatField())).order_by('-total_score_vs_opp'))
-                stats['top_players'] = top_players
-
-        except Opponent.DoesNotExist: stats['error'] = "Selected opponent not found."
-        except Exception as e: print(f"Error calculating opponent stats for ID {opponent_id}, GameType ID {game_type_id}: {e}"); stats['error'] = "An error occurred while calculating statistics."
+        # Pick the selections out of the dropdown lists rather than querying for them again
+        selected_opponent = next((o for o in opponents if str(o.id) == opponent_id), None)
+        selected_game_type = next((gt for gt in game_types if str(gt.id) == game_type_id), None) if game_type_id else None
+        if selected_opponent is None:
+            stats['error'] = "Selected opponent not found."
+        else:
+            try:
+                # Fixed number of queries however many games were played (scores/opponent_stats.py)
+                stats, chart_data = await sync_to_async(opponent_stats)(selected_opponent, selected_game_type)
+                if chart_data: chart_data_json = json.dumps(chart_data)
+            except Exception as e: print(f"Error calculating opponent stats for ID {opponent_id}, GameType ID {game_type_id}: {e}"); stats['error'] = "An error occurred while calculating statistics."
 
     context = {
         'opponents': opponents, 'game_types': game_types,
         'selected_opponent': selected_opponent, 'selected_game_type': selected_game_type,
         'stats': stats, 'chart_data_json': chart_data_json,
     }
-    return render(request, 'scores/opponent_statistics.html', context)
\ No newline at end of file
+    return await sync_to_async(render)(request, 'scores/opponent_statistics.html', context)
+
+
+# --- Leaderboards JSON ---
+def ajax_leaderboards(request):
+    """Top own-team players by total, average per cycle and zero-roll rate; ?season=YYYY&game_type=<id>&limit=n"""
+    try:
+        season = int(request.GET['season']) if request.GET.get('season') else None
+        game_type_id = int(request.GET['game_type']) if request.GET.get('game_type') else None
+        limit = int(request.GET.get('limit', 5))
+    except ValueError:
+        return JsonResponse({'error': 'season, game_type and limit must be integers.'}, status=400)
+
+    boards = get_leaderboards(season=season, game_type_id=game_type_id, limit=limit)
+    return JsonResponse({
+        'season': season,
+        'game_type': game_type_id,
+        'seasons': available_seasons(),
+        **boards,
+    })
+
+
+# --- Query timing ring buffer (QUERY_TIMING=True, see scores/middleware.py) ---
+@staff_member_required
+def query_timings(request):
+    from django.conf import settings
+    try:
+        limit = max(1, int(request.GET.get('limit', 50)))
+    except ValueError:
+        limit = 50
+    entries = recent_requests()
+    slow_first = request.GET.get('sort') == 'slowest'
+    if slow_first:
+        entries.sort(key=lambda entry: entry['total_ms'], reverse=True)
+    return JsonResponse({
+        'enabled': settings.QUERY_TIMING,
+        'requests': entries[:limit],
+    })
+
+# --- Live socket counts per game group (this worker process; see scores/consumers.py) ---
+@staff_member_required
+def live_connections(request):
+    """
+    Open game sockets in whichever worker answers the request, not across workers;
+    "scope" says so in the reply and "pid" tells the workers apart.
+    """
+    import os
+    return JsonResponse({'scope': 'process', 'pid': os.getpid(), 'groups': connection_counts()})